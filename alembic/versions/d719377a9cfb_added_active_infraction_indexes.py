@@ -0,0 +1,32 @@
+"""added active infraction indexes
+
+Revision ID: d719377a9cfb
+Revises: 6a517d52c199
+Create Date: 2026-10-17 10:12:44.513208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd719377a9cfb'
+down_revision = '6a517d52c199'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_infractions_active_guild_user_type', 'infractions', ['guild', 'user', 'type'],
+        unique=False, postgresql_where=sa.text('active')
+    )
+    op.create_index(
+        'ix_infractions_active_expiry', 'infractions', ['expiry'],
+        unique=False, postgresql_where=sa.text('active AND NOT permanent')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_infractions_active_expiry', table_name='infractions')
+    op.drop_index('ix_infractions_active_guild_user_type', table_name='infractions')
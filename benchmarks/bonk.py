@@ -0,0 +1,104 @@
+"""
+Benchmark bonk gif generation.
+
+Compares the previous approach (decoding and converting every frame of the base gif for each
+render, one render at a time) with the current one (frames converted once per process, renders
+spread over a process pool, repeated avatars served from the cog's render cache).
+
+Usage: python -m benchmarks.bonk [renders]
+"""
+import asyncio
+import sys
+import time
+from concurrent import futures
+from io import BytesIO
+
+from PIL import Image, ImageSequence
+
+from bot.exts.fun import _bonk_render as render, bonker
+
+
+def make_avatar(seed: int) -> bytes:
+    """Return a PNG avatar filled with a colour derived from `seed`."""
+    avatar = Image.new("RGBA", (128, 128), ((seed * 37) % 256, (seed * 91) % 256, (seed * 53) % 256, 255))
+    out = BytesIO()
+    avatar.save(out, "PNG")
+    return out.getvalue()
+
+
+def generate_gif_uncached(pfp: bytes) -> bytes:
+    """Render a bonk gif the way it was done before frames were converted once per process."""
+    pfp = Image.open(BytesIO(pfp))
+    pfps_by_size = {
+        "large": pfp.resize((render.LARGE_DIAMETER,) * 2),
+        "small": pfp.resize((render.SMALL_DIAMETER,) * 2),
+    }
+
+    with Image.open(render.BONK_GIF_PATH) as bonk_gif:
+        out_images = []
+        for i, frame in enumerate(ImageSequence.Iterator(bonk_gif)):
+            canvas = Image.new("RGBA", bonk_gif.size)
+            canvas.paste(frame.convert("RGBA"), (0, 0))
+            out_images.append(render._generate_frame(i, canvas, pfps_by_size))
+
+    out_gif = BytesIO()
+    out_images[0].save(out_gif, "GIF", save_all=True, append_images=out_images[1:], loop=0, duration=50)
+    return out_gif.getvalue()
+
+
+class FakeAsset:
+    """Stands in for a `discord.Asset`, with its key derived from the avatar's contents."""
+
+    def __init__(self, avatar: bytes) -> None:
+        self.key = str(hash(avatar))
+        self._avatar = avatar
+
+    async def read(self) -> bytes:
+        return self._avatar
+
+
+def report(name: str, renders: int, elapsed: float) -> None:
+    print(f"{name:<28} {renders:>5} gifs in {elapsed:7.2f}s  {renders / elapsed:7.2f} gifs/s")
+
+
+async def render_through_cog(cog: bonker.Bonk, assets: list) -> None:
+    """Render `assets` through the cog, the first time each avatar is seen before any repeat of it."""
+    first, repeats, seen = [], [], set()
+    for asset in assets:
+        (repeats if asset.key in seen else first).append(asset)
+        seen.add(asset.key)
+
+    await asyncio.gather(*(cog.render(asset) for asset in first))
+    # Every avatar was rendered once, so these are all served by the render cache.
+    await asyncio.gather(*(cog.render(asset) for asset in repeats))
+
+
+def main(renders: int) -> None:
+    # Half of the avatars repeat, like a user being bonked more than once.
+    avatars = [make_avatar(i % max(renders // 2, 1)) for i in range(renders)]
+
+    start = time.perf_counter()
+    for avatar in avatars:
+        generate_gif_uncached(avatar)
+    report("before (serial, uncached)", renders, time.perf_counter() - start)
+
+    cog = bonker.Bonk(bot=None)
+    pool = cog.start_executor()
+    try:
+        # Don't count worker start-up, it happens when the cog loads.
+        futures.wait([pool.submit(render.load_base_frames) for _ in range(pool._max_workers)])
+
+        start = time.perf_counter()
+        list(pool.map(render.generate_gif, avatars))
+        report("after (process pool)", renders, time.perf_counter() - start)
+
+        assets = [FakeAsset(avatar) for avatar in avatars]
+        start = time.perf_counter()
+        asyncio.run(render_through_cog(cog, assets))
+        report("after (pool + render cache)", renders, time.perf_counter() - start)
+    finally:
+        cog.cog_unload()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
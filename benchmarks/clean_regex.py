@@ -0,0 +1,78 @@
+"""
+Benchmark the predicate of `clean regex`.
+
+Compares the previous predicate (the pattern lowercased and compiled through re's cache, and the
+content joined with every embed attribute into a lowercased string, for every message) with the
+current one (the pattern compiled once, lowercase patterns searching lowercased text instead of
+using re.IGNORECASE, embeds only searched when the content doesn't match).
+
+Usage: python -m benchmarks.clean_regex [messages]
+"""
+import re
+import sys
+import time
+from types import SimpleNamespace
+
+from bot.utils.regex import compile_safe, message_matches
+
+PATTERN = r"free\s+nitro"
+
+
+def make_message(seed: int) -> SimpleNamespace:
+    """Return a stand-in for a message, a third of which have embeds and a tenth of which match."""
+    content = "claim your FREE  nitro now" if seed % 10 == 0 else f"just chatting about things, message {seed}"
+
+    embeds = []
+    if seed % 3 == 0:
+        embeds.append(SimpleNamespace(
+            title="Link preview",
+            description="Some page which was linked in chat " * 4,
+            footer=SimpleNamespace(text="example.com"),
+            author=SimpleNamespace(name="Example"),
+            fields=[SimpleNamespace(name=f"Field {i}", value="value " * 8) for i in range(3)],
+        ))
+
+    return SimpleNamespace(content=content, embeds=embeds)
+
+
+def predicate_before(regex: str, message: SimpleNamespace) -> bool:
+    """The predicate as it was before the pattern was compiled once."""
+    content = [message.content]
+
+    for embed in message.embeds:
+        content.append(embed.title)
+        content.append(embed.description)
+        content.append(embed.footer.text)
+        content.append(embed.author.name)
+        for field in embed.fields:
+            content.append(field.name)
+            content.append(field.value)
+
+    content = [attr for attr in content if attr]
+    content = "\n".join(content)
+
+    if not content:
+        return False
+    else:
+        return bool(re.search(regex.lower(), content.lower()))
+
+
+def report(name: str, count: int, elapsed: float, matched: int) -> None:
+    print(f"{name:<8} {elapsed * 1e9 / count:8.0f} ns/message  ({matched} of {count} matched)")
+
+
+def main(count: int) -> None:
+    messages = [make_message(i) for i in range(count)]
+
+    start = time.perf_counter()
+    matched = sum(predicate_before(PATTERN, message) for message in messages)
+    report("before", count, time.perf_counter() - start, matched)
+
+    start = time.perf_counter()
+    pattern = compile_safe(PATTERN)
+    matched = sum(message_matches(pattern, message) for message in messages)
+    report("after", count, time.perf_counter() - start, matched)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,107 @@
+"""
+Benchmark the word diff of edited messages logged by the mod log.
+
+Compares the previous diff (`difflib.ndiff` over the words of both versions, with no length cap)
+with the current one (`SequenceMatcher` over word ids, capped at `MAX_DIFF_WORDS` words) on a
+corpus of edits: typo fixes, appended sentences, rewritten sentences, long pastes and edits which
+only changed embeds.
+
+Usage: python -m benchmarks.edit_diff [edits]
+"""
+import difflib
+import itertools
+import random
+import sys
+import time
+
+from bot.utils.word_diff import format_edit
+
+WORDS = (
+    "the a to and of it is that you in for this on with have but not be just so like was what can "
+    "do if about think would get there they at know one are my me all or as people python function "
+    "error code bot discord message server channel please help thanks why does work when use"
+).split()
+
+
+def sentence(rng: random.Random, length: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def make_edit(rng: random.Random) -> tuple:
+    """Return the content of a message before and after an edit."""
+    kind = rng.randrange(5)
+    before = sentence(rng, rng.randint(5, 60))
+    words = before.split()
+
+    if kind == 0:  # Typo fix
+        index = rng.randrange(len(words))
+        words[index] = words[index][::-1]
+        return before, " ".join(words)
+    if kind == 1:  # Appended sentence
+        return before, f"{before} {sentence(rng, rng.randint(3, 20))}"
+    if kind == 2:  # Rewritten sentence
+        start = rng.randrange(len(words))
+        words[start:start + 8] = sentence(rng, 8).split()
+        return before, " ".join(words)
+    if kind == 3:  # Long paste with a few changes
+        before = sentence(rng, rng.randint(300, 800))
+        words = before.split()
+        for _ in range(5):
+            words[rng.randrange(len(words))] = rng.choice(WORDS)
+        return before, " ".join(words)
+    return before, before  # Only the embeds changed
+
+
+def diff_before(before: str, after: str) -> tuple:
+    """The diff as it was before word ids were compared."""
+    diff = difflib.ndiff(before.split(), after.split())
+    diff_groups = tuple(
+        (diff_type, tuple(s[2:] for s in diff_words))
+        for diff_type, diff_words in itertools.groupby(diff, key=lambda s: s[0])
+    )
+
+    content_before = []
+    content_after = []
+    for index, (diff_type, words) in enumerate(diff_groups):
+        sub = " ".join(words)
+        if diff_type == "-":
+            content_before.append(f"[{sub}](http://o.hi)")
+        elif diff_type == "+":
+            content_after.append(f"[{sub}](http://o.hi)")
+        elif diff_type == " ":
+            if len(words) > 2:
+                sub = (
+                    f"{words[0] if index > 0 else ''}"
+                    " ... "
+                    f"{words[-1] if index < len(diff_groups) - 1 else ''}"
+                )
+            content_before.append(sub)
+            content_after.append(sub)
+
+    return " ".join(content_before), " ".join(content_after)
+
+
+def diff_after(before: str, after: str) -> tuple:
+    """The diff as the mod log computes it now, skipping unchanged content."""
+    if before == after:
+        return None
+    return format_edit(before, after)
+
+
+def report(name: str, count: int, elapsed: float) -> None:
+    print(f"{name:<8} {elapsed * 1e6 / count:8.1f} us/edit")
+
+
+def main(count: int) -> None:
+    rng = random.Random(0)
+    edits = [make_edit(rng) for _ in range(count)]
+
+    for name, diff in (("before", diff_before), ("after", diff_after)):
+        start = time.perf_counter()
+        for before, after in edits:
+            diff(before, after)
+        report(name, count, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,218 @@
+"""
+Benchmark bot start-up.
+
+Boots the bot against a local stand-in for Discord's HTTP API and gateway, loading every
+extension and connecting to the Postgres database from the configuration, and reports:
+
+- the import time of each module, from a separate `python -X importtime` run,
+- the time taken to import the bot and to load each extension,
+- the time until the gateway READY event was handled,
+- the time from READY until the database was connected and the guild settings cache warmed.
+
+The results are printed as JSON so they can be compared across releases.
+
+Usage: python -m benchmarks.startup [--top N] [--output FILE]
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+from aiohttp import WSMsgType, web
+
+IMPORT_SCRIPT = (
+    "import importlib, bot.bot\n"
+    "from bot.utils.extensions import get_extensions\n"
+    "for ext in sorted(get_extensions()): importlib.import_module(ext)\n"
+)
+
+# Seconds to wait for the database to connect after READY before giving up.
+DATABASE_TIMEOUT = 60
+
+BOT_USER = {
+    "id": "100000000000000000",
+    "username": "Benchmark",
+    "discriminator": "0000",
+    "avatar": None,
+    "bot": True,
+    "verified": True,
+    "mfa_enabled": False,
+    "flags": 0,
+}
+
+
+def profile_imports(top: int) -> dict:
+    """Import the bot and all extensions in a fresh interpreter and return the slowest modules."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    modules = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+
+    bot_modules = [module for module in modules if module["module"].startswith("bot")]
+    return {
+        "total_ms": sum(module["self_ms"] for module in modules),
+        "bot_total_ms": sum(module["self_ms"] for module in bot_modules),
+        "slowest": sorted(modules, key=lambda module: module["self_ms"], reverse=True)[:top],
+    }
+
+
+class FakeDiscord:
+    """
+    The least of Discord's HTTP API and gateway needed for the bot to log in and become ready.
+
+    Unknown routes respond with a 404, which the bot treats like any other missing resource.
+    """
+
+    def __init__(self) -> None:
+        self.app = web.Application()
+        self.app.router.add_get("/api/v{version}/users/@me", self.current_user)
+        self.app.router.add_get("/api/v{version}/gateway", self.gateway)
+        self.app.router.add_get("/api/v{version}/gateway/bot", self.gateway)
+        self.app.router.add_get("/ws", self.websocket)
+        self.app.router.add_route("*", "/{tail:.*}", self.not_found)
+
+        self.runner = web.AppRunner(self.app, access_log=None)
+        self.port = None
+
+    async def start(self) -> None:
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        await self.runner.cleanup()
+
+    @property
+    def api_base(self) -> str:
+        return f"http://127.0.0.1:{self.port}/api/v9"
+
+    async def current_user(self, request: web.Request) -> web.Response:
+        return web.json_response(BOT_USER)
+
+    async def gateway(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "url": f"ws://127.0.0.1:{self.port}/ws",
+            "shards": 1,
+            "session_start_limit": {"total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": 1},
+        })
+
+    async def not_found(self, request: web.Request) -> web.Response:
+        return web.json_response({"message": "Unknown", "code": 0}, status=404)
+
+    async def websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        await ws.send_json({"op": 10, "d": {"heartbeat_interval": 41250}})
+        sequence = 0
+
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                continue
+            payload = json.loads(message.data)
+
+            if payload["op"] == 1:  # Heartbeat
+                await ws.send_json({"op": 11})
+            elif payload["op"] == 2:  # Identify
+                sequence += 1
+                await ws.send_json({
+                    "op": 0,
+                    "t": "READY",
+                    "s": sequence,
+                    "d": {
+                        "v": 9,
+                        "user": BOT_USER,
+                        "guilds": [],
+                        "session_id": "benchmark",
+                        "application": {"id": BOT_USER["id"], "flags": 0},
+                    },
+                })
+
+        return ws
+
+
+async def boot(start: float) -> dict:
+    """Boot the bot against the fake Discord and return how long each stage took."""
+    imported = time.perf_counter()
+    import discord
+    from bot.bot import Bot
+    from bot.utils.extensions import get_extensions
+    import_seconds = time.perf_counter() - imported
+
+    fake = FakeDiscord()
+    await fake.start()
+    discord.http.Route.BASE = fake.api_base
+
+    bot = Bot.create(guild_ready_timeout=0)
+
+    loading = time.perf_counter()
+    for ext in get_extensions():
+        bot.load_extension(ext)
+    extensions_seconds = time.perf_counter() - loading
+
+    connecting = time.perf_counter()
+    runner = asyncio.create_task(bot.start("benchmark"))
+    try:
+        await bot.wait_until_ready()
+        ready = time.perf_counter()
+        await asyncio.wait_for(bot.wait_until_database_ready(), timeout=DATABASE_TIMEOUT)
+        database_ready = time.perf_counter()
+    finally:
+        await bot.close()
+        await asyncio.gather(runner, return_exceptions=True)
+        await fake.close()
+
+    return {
+        "import_seconds": import_seconds,
+        "load_extensions_seconds": extensions_seconds,
+        "extensions": dict(sorted(bot.extension_load_times.items(), key=lambda item: item[1], reverse=True)),
+        "connect_to_ready_seconds": ready - connecting,
+        "database_ready_seconds": database_ready - ready,
+        "time_to_ready_seconds": ready - start,
+        "time_to_database_ready_seconds": database_ready - start,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=25, help="number of slowest imports to report")
+    parser.add_argument("--output", help="write the results to this file instead of stdout")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        results = loop.run_until_complete(boot(start))
+    finally:
+        loop.close()
+
+    results["imports"] = profile_imports(args.top)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
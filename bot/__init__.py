@@ -1,9 +1,13 @@
 import asyncio
+import multiprocessing
 import os
 
 from bot import log
 
-log.setup()
+# Worker processes, such as the bonk renderers, import the package too, but only the main process
+# should open the log files and start the listener thread.
+if multiprocessing.parent_process() is None:
+    log.setup()
 
 # On Windows, the selector event loop is required for aiodns.
 if os.name == "nt":
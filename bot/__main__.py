@@ -1,13 +1,13 @@
 from bot.bot import Bot
 from bot.log import setup_sentry
 import bot.constants as constants
-from bot.utils.extensions import walk_extensions
+from bot.utils.extensions import get_extensions
 
 setup_sentry()
 
 bot = Bot.create()
 
-for ext in walk_extensions():
+for ext in get_extensions():
     bot.load_extension(ext)
 
 bot.run(constants.Bot.token)
@@ -1,6 +1,8 @@
 import asyncio
+import functools
 import logging
 import socket
+import time
 
 import arrow
 import aiohttp
@@ -10,7 +12,10 @@ from discord.ext import commands
 
 import bot.constants as constants
 from bot.database.database import connect
+from bot.utils import command_stats, metrics
 from bot.utils.bot_prefix import BotPrefixHandler
+from bot.utils.guild_settings import guild_settings
+from bot.utils.loop_monitor import LoopMonitor
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +30,7 @@ class Bot(commands.bot.Bot):
     """
 
     startup_time = arrow.utcnow()
+    _startup_clock = time.perf_counter()
     name = constants.Bot.name
 
     def __init__(self, **kwargs):
@@ -36,15 +42,43 @@ class Bot(commands.bot.Bot):
         self._connector = None
         self._resolver = None
         self.http_session = None
+        self.guild_settings = guild_settings
+        self.extension_load_times = {}
+        self._startup_profiled = False
+        self.command_stats = command_stats.CommandStats(constants.Metrics.slow_command_threshold)
+        self.loop_monitor = LoopMonitor(
+            self.loop,
+            interval=constants.Metrics.loop_lag_interval,
+            threshold=constants.Metrics.loop_lag_threshold,
+        )
+        self.loop_monitor.start()
+
+        self.http.request = self._timed_request(self.http.request)
+
+    @staticmethod
+    def _timed_request(request):
+        """Wrap the HTTP client's `request` method to record how long each API request takes."""
+        @functools.wraps(request)
+        async def wrapper(route, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await request(route, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                metrics.http_request_seconds.observe(elapsed, method=route.method, route=route.path)
+                command_stats.add_http_time(elapsed)
+
+        return wrapper
 
     @classmethod
-    def create(cls):
+    def create(cls, **kwargs):
         intents = discord.Intents.default()
         intents.members = True
         return cls(
             command_prefix=BotPrefixHandler.get_prefix,
             activity=discord.Game(name=f"Commands: {constants.Bot.prefix}help"),
             intents=intents,
+            **kwargs,
         )
 
     def add_cog(self, cog):
@@ -57,17 +91,69 @@ class Bot(commands.bot.Bot):
         logger.info(f"Cog loaded: {cog.qualified_name}")
 
     def load_extension(self, name, *, package=None):
+        start = time.perf_counter()
         super(Bot, self).load_extension(name, package=package)
+        self.extension_load_times[name] = time.perf_counter() - start
         logger.info(f"Extension loaded: {name}")
 
     def unload_extension(self, name, *, package=None):
         super(Bot, self).unload_extension(name, package=package)
         logger.info(f"Extension unloaded: {name}")
 
+    def log_startup_profile(self) -> None:
+        """Log the time each extension took to import and set up, and the time until the bot was ready."""
+        lines = [
+            f"{elapsed * 1000:8.1f} ms  {name}"
+            for name, elapsed in sorted(self.extension_load_times.items(), key=lambda item: item[1], reverse=True)
+        ]
+        total = sum(self.extension_load_times.values())
+        ready = time.perf_counter() - self._startup_clock
+
+        logger.info(
+            f"Startup profile: ready after {ready:.2f}s, "
+            f"{len(lines)} extensions loaded in {total * 1000:.1f} ms:\n" + "\n".join(lines)
+        )
+
+    async def invoke(self, ctx: commands.Context) -> None:
+        """Invoke the command of `ctx`, recording its wall time along with the DB and HTTP time it spent."""
+        if ctx.command is None:
+            await super().invoke(ctx)
+            return
+
+        timing = command_stats.CommandTiming(ctx.command.qualified_name)
+        token = command_stats.current_timing.set(timing)
+        try:
+            await super().invoke(ctx)
+        finally:
+            command_stats.current_timing.reset(token)
+            timing.finish()
+
+            # Groups replace `ctx.command` with the subcommand which was actually invoked.
+            timing.command = ctx.command.qualified_name
+            self.command_stats.record(
+                timing,
+                guild=ctx.guild.id if ctx.guild else None,
+                channel=ctx.channel.id,
+                author=ctx.author.id,
+                failed=ctx.command_failed,
+            )
+
+    async def on_config_reload(self, changes: dict) -> None:
+        """Apply reloaded settings which were copied out of the configuration at startup."""
+        self.command_stats.slow_threshold = constants.Metrics.slow_command_threshold
+        self.loop_monitor.interval = constants.Metrics.loop_lag_interval
+        self.loop_monitor.threshold = constants.Metrics.loop_lag_threshold
+
     async def on_ready(self):
         await connect()
+        if not self.guild_settings.ready:
+            await self.guild_settings.warm()
         self._database_available.set()
 
+        if constants.Startup.profile and not self._startup_profiled:
+            self._startup_profiled = True
+            self.log_startup_profile()
+
     async def login(self, *args, **kwargs):
         # Use asyncio for DNS resolution instead of threads so threads aren't spammed.
         self._resolver = aiohttp.AsyncResolver()
@@ -83,6 +169,11 @@ class Bot(commands.bot.Bot):
 
         await super().login(*args, **kwargs)
 
+    async def close(self) -> None:
+        """Stop monitoring the event loop and close the bot."""
+        self.loop_monitor.stop()
+        await super().close()
+
     async def wait_until_database_ready(self):
         await self._database_available.wait()
 
@@ -1,5 +1,6 @@
 import re
 import logging
+import typing as t
 from os import getenv
 from enum import Enum
 
@@ -27,20 +28,110 @@ def env_var_constructor(loader, node):
 yaml.SafeLoader.add_constructor("!ENV", env_var_constructor)
 yaml.SafeLoader.add_implicit_resolver("!ENV", env_regex, None)
 
-with open("config-default.yaml", "r") as config:
-    _CONFIG_YAML = yaml.safe_load(config)
+CONFIG_PATH = "config-default.yaml"
+
+
+def _load_yaml() -> dict:
+    with open(CONFIG_PATH, "r") as config:
+        return yaml.safe_load(config)
+
+
+_CONFIG_YAML = _load_yaml()
+
+
+class ConfigError(Exception):
+    """Raised at startup when the configuration doesn't match the sections declared below."""
+
+
+class ConfigSection:
+    """
+    Base class of compiled configuration sections.
+
+    Every annotated key of a section is stored in a slot of a frozen instance, so reading a
+    configuration value is a plain attribute lookup.
+    """
+
+    __slots__ = ()
+
+    section: str
+    subsection = None
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Configuration section {type(self).__name__} is read-only.")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Configuration section {type(self).__name__} is read-only.")
+
+    def __getitem__(self, name):
+        return getattr(self, name.lower())
+
+    def __iter__(self):
+        """Return generator of key: value pairs of current constants class' config values."""
+        for name in self.__slots__:
+            yield name, getattr(self, name)
+
+    def _replace(self, values: dict) -> None:
+        """Overwrite every value of the section, used by `reload_config`."""
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"<{type(self).__name__} {values}>"
+
+
+def _check_type(value, annotation) -> bool:
+    """Return True if `value` fits the simple type `annotation`, values missing from the environment are allowed."""
+    if value is None:
+        return True
+    if annotation is float:
+        return isinstance(value, (int, float))
+    expected = t.get_origin(annotation) or annotation
+    return not isinstance(expected, type) or isinstance(value, expected)
+
+
+def _read_section(config: dict, section: str, subsection: t.Optional[str], annotations: dict) -> dict:
+    """Return the values of the annotated keys of a section from `config`, raising a `ConfigError` if they don't fit."""
+    path = f"{section}.{subsection}" if subsection is not None else section
+    try:
+        data = config[section]
+        if subsection is not None:
+            data = data[subsection]
+    except (KeyError, TypeError):
+        data = None
+
+    if not isinstance(data, dict):
+        raise ConfigError(f"Configuration section `{path}` is missing.")
+
+    missing = [key for key in annotations if key not in data]
+    if missing:
+        raise ConfigError(f"Configuration section `{path}` is missing keys: {', '.join(missing)}.")
+
+    for key, annotation in annotations.items():
+        if not _check_type(data[key], annotation):
+            raise ConfigError(f"Configuration variable `{path}.{key}` should be {annotation}, got {data[key]!r}.")
+
+    return {key: data[key] for key in annotations}
+
+
+# Every compiled section, so they can be updated when the configuration is reloaded.
+_SECTIONS: t.List[ConfigSection] = []
 
 
 class YAMLGetter(type):
     """
-    Implements a custom metaclass used for accessing
-    configuration data by simply accessing class attributes.
+    Compiles a class declaring configuration keys into a frozen configuration object.
     Supports getting configuration from up to two levels
     of nested configuration through `section` and `subsection`.
     `section` specifies the YAML configuration section (or "key")
     in which the configuration lives, and must be set.
     `subsection` is an optional attribute specifying the section
     within the section from which configuration should be loaded.
+
+    Every annotated name is a required key. The values are read once when the class is
+    defined; missing sections or keys and values of the wrong type raise a `ConfigError`,
+    so a broken configuration fails at startup. The class statement binds an instance of a
+    slotted `ConfigSection` subclass instead of a class.
     Example Usage:
         # config.yaml
         bot:
@@ -51,6 +142,9 @@ class YAMLGetter(type):
         class Prefixes(metaclass=YAMLGetter):
             section = "bot"
             subsection = "prefixes"
+
+            direct_message: str
+            guild: str
         # Usage in Python code
         from config import Prefixes
         def get_prefix(bot, message):
@@ -59,34 +153,70 @@ class YAMLGetter(type):
             return Prefixes.guild
     """
 
-    subsection = None
+    def __new__(mcs, name, bases, namespace):
+        section = namespace["section"]
+        subsection = namespace.get("subsection")
+        annotations = namespace.get("__annotations__", {})
+
+        values = _read_section(_CONFIG_YAML, section, subsection, annotations)
+
+        compiled = type(name, (ConfigSection,), {
+            "__slots__": tuple(annotations),
+            "__annotations__": annotations,
+            "__module__": namespace.get("__module__"),
+            "__qualname__": namespace.get("__qualname__", name),
+            "section": section,
+            "subsection": subsection,
+        })
+
+        instance = object.__new__(compiled)
+        instance._replace(values)
+        _SECTIONS.append(instance)
+        return instance
 
-    def __getattr__(cls, name):
-        name = name.lower()
-
-        try:
-            if cls.subsection is not None:
-                return _CONFIG_YAML[cls.section][cls.subsection][name]
-            return _CONFIG_YAML[cls.section][name]
-        except KeyError as e:
-            dotted_path = ".".join(
-                (cls.section, cls.subsection, name)
-                if cls.subsection is not None
-                else (cls.section, name)
-            )
-            # Only an INFO log since this can be caught through `hasattr` or `getattr`.
-            log.info(
-                f"Tried accessing configuration variable at `{dotted_path}`, but it could not be found."
-            )
-            raise AttributeError(repr(name)) from e
-
-    def __getitem__(cls, name):
-        return cls.__getattr__(name)
-
-    def __iter__(cls):
-        """Return generator of key: value pairs of current constants class' config values."""
-        for name in cls.__annotations__:
-            yield name, getattr(cls, name)
+
+def reload_config() -> t.Dict[str, t.Dict[str, t.Tuple[t.Any, t.Any]]]:
+    """
+    Re-read the configuration file and update every compiled section in place.
+
+    All sections are validated against the new file before any of them is touched, so a broken
+    file raises a `ConfigError` and leaves the running configuration as it was. The swap itself
+    doesn't yield to the event loop, so no coroutine can observe a half-updated configuration.
+    Existing references such as `from bot.constants import Roles` see the new values.
+
+    Return the changed values as a mapping of section names to {key: (old, new)}.
+    """
+    global _CONFIG_YAML
+
+    try:
+        config = _load_yaml()
+    except OSError as e:
+        # Editors which save by replacing the file can leave it missing for a moment.
+        raise ConfigError(f"Configuration file could not be read: {e}") from e
+    except yaml.YAMLError as e:
+        raise ConfigError(f"Configuration file could not be parsed: {e}") from e
+
+    new_values = [
+        (section, _read_section(config, section.section, section.subsection, type(section).__annotations__))
+        for section in _SECTIONS
+    ]
+
+    changes = {}
+    for section, values in new_values:
+        changed = {
+            key: (getattr(section, key), value)
+            for key, value in values.items()
+            if getattr(section, key) != value
+        }
+        if changed:
+            changes[type(section).__name__] = changed
+
+    _CONFIG_YAML = config
+    for section, values in new_values:
+        section._replace(values)
+
+    log.info(f"Configuration reloaded, changed sections: {', '.join(changes) or 'none'}.")
+    return changes
 
 
 class Bot(metaclass=YAMLGetter):
@@ -175,6 +305,74 @@ class CleanMessages(metaclass=YAMLGetter):
     message_limit: int
 
 
+class Scheduling(metaclass=YAMLGetter):
+    section = "bot"
+    subsection = "scheduling"
+
+    reschedule_window: int
+
+
+class Voting(metaclass=YAMLGetter):
+    section = "bot"
+    subsection = "voting"
+
+    update_interval: int
+
+
+class Metrics(metaclass=YAMLGetter):
+    section = "bot"
+    subsection = "metrics"
+
+    enabled: bool
+    host: str
+    port: int
+    slow_command_threshold: float
+    loop_lag_interval: float
+    loop_lag_threshold: float
+
+
+class Logging(metaclass=YAMLGetter):
+    section = "bot"
+    subsection = "logging"
+
+    json: bool
+    sample_rates: dict
+
+
+class Startup(metaclass=YAMLGetter):
+    section = "bot"
+    subsection = "startup"
+
+    lazy: bool
+    profile: bool
+
+
+class ConfigWatcher(metaclass=YAMLGetter):
+    section = "bot"
+    subsection = "config_watcher"
+
+    enabled: bool
+    interval: float
+
+
+class MessageStore(metaclass=YAMLGetter):
+    section = "bot"
+    subsection = "message_store"
+
+    max_messages_per_guild: int
+    spill: bool
+    flush_interval: float
+    retention: int
+
+
+class MemberJoin(metaclass=YAMLGetter):
+    section = "bot"
+    subsection = "member_join"
+
+    welcome_dm_rate: float
+    welcome_dm_backlog: int
+
+
 class Database(metaclass=YAMLGetter):
     section = "database"
 
@@ -1,12 +1,19 @@
+import functools
 import logging
+import time
 
 from gino import Gino
+from gino.engine import GinoConnection
 
 from bot.constants import Database as DatabaseConfig
+from bot.utils import command_stats, metrics
 
 db = Gino()
 log = logging.getLogger(__name__)
 
+# Every query ends up in one of these, `one`/`one_or_none` go through `first`.
+_TIMED_QUERY_METHODS = ("all", "first", "scalar", "status")
+
 
 def build_db_uri() -> str:
     """Use information from the config file to build a PostgreSQL URI."""
@@ -17,8 +24,33 @@ def build_db_uri() -> str:
     )
 
 
+def _timed_query(method_name: str, method):
+    """Wrap the connection `method` to record how long each query takes."""
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.db_query_seconds.observe(elapsed, method=method_name)
+            command_stats.add_db_time(elapsed)
+
+    wrapper.__timed__ = True
+    return wrapper
+
+
+def instrument_queries() -> None:
+    """Record the duration of every query made through a Gino connection."""
+    for name in _TIMED_QUERY_METHODS:
+        method = getattr(GinoConnection, name)
+        if not getattr(method, "__timed__", False):
+            setattr(GinoConnection, name, _timed_query(name, method))
+
+
 async def connect() -> None:
     """Initiate a connection to the database."""
     log.info("Initiating connection to the database")
+    instrument_queries()
     await db.set_bind(build_db_uri())
     log.info("Database connection established")
@@ -29,6 +29,14 @@ class Infraction(db.Model):
     inserted_at = db.Column(db.DateTime())
     expiry = db.Column(db.DateTime(), nullable=True)
 
+    # Lookups and rescheduling only ever care about active infractions.
+    _active_idx = db.Index(
+        "ix_infractions_active_guild_user_type", "guild", "user", "type", postgresql_where=db.text("active")
+    )
+    _expiry_idx = db.Index(
+        "ix_infractions_active_expiry", "expiry", postgresql_where=db.text("active AND NOT permanent")
+    )
+
 
 class Reminder(db.Model):
     __tablename__ = "reminders"
@@ -50,4 +58,31 @@ class MessageLog(db.Model):
     guild = db.Column(db.String())
     inserted_at = db.Column(db.DateTime())
     messages = db.Column(db.String())  # JSON: {"msgs":[MSG_OBJ]}
+    data = db.Column(db.LargeBinary())  # zlib compressed newline delimited JSON, one message per line
+
+
+class Poll(db.Model):
+    __tablename__ = "polls"
+
+    id = db.Column(db.String(), primary_key=True)  # ID of the poll message
+    channel_id = db.Column(db.String())
+    guild_id = db.Column(db.String())
+    title = db.Column(db.String())
+    options = db.Column(db.String())  # JSON: {EMOJI: OPTION}
+    expiry = db.Column(db.DateTime())
+
+
+class StoredMessage(db.Model):
+    __tablename__ = "stored_messages"
+
+    id = db.Column(db.String(), primary_key=True)  # ID of the message
+    guild_id = db.Column(db.String())
+    channel_id = db.Column(db.String())
+    author_id = db.Column(db.String())
+    author_name = db.Column(db.String())
+    content = db.Column(db.String())
+    attachments = db.Column(db.String())  # Newline separated attachment URLs
+    created_at = db.Column(db.DateTime())
 
+    # Rows past their retention are pruned by age.
+    _created_at_idx = db.Index("ix_stored_messages_created_at", "created_at")
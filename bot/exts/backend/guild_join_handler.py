@@ -2,7 +2,7 @@ import discord
 from discord.ext import commands
 
 from bot.bot import Bot
-from bot.database.models import Guild
+from bot.utils.guild_settings import guild_settings
 
 
 class GuildJoinHandler(commands.Cog):
@@ -41,7 +41,7 @@ class GuildJoinHandler(commands.Cog):
             voiceban_perms.update(send_messages=True, send_messages_in_threads=True)
             voiceban_role = await guild.create_role(name="Voicebanned", permissions=voiceban_perms)
 
-        await Guild.create(
+        await guild_settings.create(
             id=str(guild.id),
             server_log_channel=str(server_logs_channel.id) if server_logs_channel else None,
             muted_role=str(muted_role.id),
@@ -0,0 +1,108 @@
+"""
+Rendering of bonk gifs.
+
+This runs in the bonk render processes, so it's kept apart from the cog and only needs Pillow:
+the workers import it without discord.py or the rest of the bot, and the `bot` package doesn't
+set up logging outside of the main process.
+"""
+import logging
+from io import BytesIO
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageDraw, ImageFile, ImageSequence
+
+logger = logging.getLogger(__name__)
+
+
+ImageFile.LOAD_TRUNCATED_IMAGES = True
+
+LARGE_DIAMETER = 110
+SMALL_DIAMETER = 90
+
+# Two masks, one for the normal size, and a smaller one for the final stage of the bonk
+LARGE_MASK = Image.new("L", (LARGE_DIAMETER,) * 2)
+draw = ImageDraw.Draw(LARGE_MASK)
+draw.ellipse((0, 0, LARGE_DIAMETER, LARGE_DIAMETER), fill=255)
+
+SMALL_MASK = Image.new("L", (SMALL_DIAMETER,) * 2)
+draw = ImageDraw.Draw(SMALL_MASK)
+draw.ellipse((0, 0, SMALL_DIAMETER, SMALL_DIAMETER), fill=255)
+
+BONK_GIF_PATH = "bot/resources/images/yodabonk.gif"
+
+PFP_ENTRY_FRAME = 31
+BONK_FRAME = 43
+PFP_EXIT_FRAME = 56
+PFP_CENTRE = (355, 73)
+
+# The base frames of the bonk gif, decoded and converted to RGBA once per process.
+_base_frames: Optional[List[Image.Image]] = None
+
+
+def load_base_frames() -> List[Image.Image]:
+    """Return the RGBA frames of the bonk gif, decoding them on first use."""
+    global _base_frames
+
+    if _base_frames is None:
+        with Image.open(BONK_GIF_PATH) as bonk_gif:
+            _base_frames = [frame.convert("RGBA") for frame in ImageSequence.Iterator(bonk_gif)]
+
+    return _base_frames
+
+
+def _generate_frame(frame_number: int, frame: Image.Image, pfps_by_size: Dict[str, Image.Image]) -> Image.Image:
+    if not PFP_ENTRY_FRAME <= frame_number <= PFP_EXIT_FRAME:
+        return frame
+
+    canvas = frame.copy()
+    if frame_number == BONK_FRAME:
+        canvas.paste(
+            pfps_by_size["small"],
+            (
+                PFP_CENTRE[0] - SMALL_DIAMETER // 2,
+                PFP_CENTRE[1]
+                - SMALL_DIAMETER // 2
+                + 10,  # Shift avatar down by 10 px in the bonk frame
+            ),
+            SMALL_MASK,
+        )
+    else:
+        canvas.paste(
+            pfps_by_size["large"],
+            (
+                PFP_CENTRE[0] - LARGE_DIAMETER // 2,
+                PFP_CENTRE[1] - LARGE_DIAMETER // 2,
+            ),
+            LARGE_MASK,
+        )
+
+    return canvas
+
+
+def generate_gif(pfp: bytes) -> bytes:
+    """Render the bonk gif for the avatar image `pfp` and return the encoded gif."""
+    logger.debug("Starting bonk gif generation.")
+
+    pfp = Image.open(BytesIO(pfp))
+    pfps_by_size = {
+        "large": pfp.resize((LARGE_DIAMETER,) * 2),
+        "small": pfp.resize((SMALL_DIAMETER,) * 2),
+    }
+
+    out_images = [
+        _generate_frame(i, frame, pfps_by_size)
+        for i, frame in enumerate(load_base_frames())
+    ]
+
+    out_gif = BytesIO()
+    out_images[0].save(
+        out_gif,
+        "GIF",
+        save_all=True,
+        append_images=out_images[1:],
+        loop=0,
+        duration=50,
+    )
+
+    logger.debug("Bonk gif generated.")
+    return out_gif.getvalue()
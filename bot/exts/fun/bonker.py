@@ -1,39 +1,24 @@
 import asyncio
 import logging
-from typing import Dict
+import multiprocessing
+import os
+from collections import OrderedDict
+from typing import Optional
 from io import BytesIO
-import functools
 from concurrent import futures
 
-from PIL import Image, ImageDraw, ImageFile, ImageSequence
 import discord
 from discord.ext import commands
 
 from bot.bot import Bot
+from bot.constants import Startup
+from bot.exts.fun._bonk_render import generate_gif, load_base_frames
 
 logger = logging.getLogger(__name__)
 
 
-ImageFile.LOAD_TRUNCATED_IMAGES = True
-
-LARGE_DIAMETER = 110
-SMALL_DIAMETER = 90
-
-# Two masks, one for the normal size, and a smaller one for the final stage of the bonk
-LARGE_MASK = Image.new("L", (LARGE_DIAMETER,) * 2)
-draw = ImageDraw.Draw(LARGE_MASK)
-draw.ellipse((0, 0, LARGE_DIAMETER, LARGE_DIAMETER), fill=255)
-
-SMALL_MASK = Image.new("L", (SMALL_DIAMETER,) * 2)
-draw = ImageDraw.Draw(SMALL_MASK)
-draw.ellipse((0, 0, SMALL_DIAMETER, SMALL_DIAMETER), fill=255)
-
-BONK_GIF = Image.open("bot/resources/images/yodabonk.gif")
-
-PFP_ENTRY_FRAME = 31
-BONK_FRAME = 43
-PFP_EXIT_FRAME = 56
-PFP_CENTRE = (355, 73)
+# Number of rendered gifs to keep around, keyed by avatar hash.
+RENDER_CACHE_SIZE = 64
 
 
 class Bonk(commands.Cog):
@@ -42,79 +27,61 @@ class Bonk(commands.Cog):
     def __init__(self, bot: Bot):
         self.bot = bot
 
-    @staticmethod
-    def _generate_frame(
-        frame_number: int, frame: Image.Image, pfps_by_size: Dict[str, int]
-    ) -> Image.Image:
-        canvas = Image.new("RGBA", BONK_GIF.size)
-        canvas.paste(frame.convert("RGBA"), (0, 0))
-
-        if PFP_ENTRY_FRAME <= frame_number <= PFP_EXIT_FRAME:
-            if frame_number == BONK_FRAME:
-                canvas.paste(
-                    pfps_by_size["small"],
-                    (
-                        PFP_CENTRE[0] - SMALL_DIAMETER // 2,
-                        PFP_CENTRE[1]
-                        - SMALL_DIAMETER // 2
-                        + 10,  # Shift avatar down by 10 px in the bonk frame
-                    ),
-                    SMALL_MASK,
-                )
-            else:
-                canvas.paste(
-                    pfps_by_size["large"],
-                    (
-                        PFP_CENTRE[0] - LARGE_DIAMETER // 2,
-                        PFP_CENTRE[1] - LARGE_DIAMETER // 2,
-                    ),
-                    LARGE_MASK,
-                )
-
-        return canvas
-
-    def _generate_gif(self, pfp: bytes) -> BytesIO:
-        logger.debug("Starting bonk gif generation.")
-
-        pfp = Image.open(BytesIO(pfp))
-        pfps_by_size = {
-            "large": pfp.resize((LARGE_DIAMETER,) * 2),
-            "small": pfp.resize((SMALL_DIAMETER,) * 2),
-        }
-
-        out_images = [
-            self._generate_frame(i, frame, pfps_by_size)
-            for i, frame in enumerate(ImageSequence.Iterator(BONK_GIF))
-        ]
-
-        out_gif = BytesIO()
-        out_images[0].save(
-            out_gif,
-            "GIF",
-            save_all=True,
-            append_images=out_images[1:],
-            loop=0,
-            duration=50,
-        )
-
-        logger.debug("Bonk gif generated.")
-        return out_gif
+        self._executor: Optional[futures.ProcessPoolExecutor] = None
+        if not Startup.lazy:
+            self.start_executor()
+
+        self.render_cache: OrderedDict[str, bytes] = OrderedDict()
+
+    def cog_unload(self) -> None:
+        """Shut down the render processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def start_executor(self) -> futures.ProcessPoolExecutor:
+        """Start the render processes, unless they're already running."""
+        if self._executor is None:
+            # Pillow holds the GIL while compositing, so render in worker processes rather than threads.
+            # Each worker converts the base frames once, as it starts; start them all now rather than on a bonk.
+            # Spawn rather than fork them, forked workers would inherit the logging and loop monitor threads' state.
+            workers = os.cpu_count() or 1
+            self._executor = futures.ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=load_base_frames,
+            )
+            for _ in range(workers):
+                self._executor.submit(load_base_frames)
+
+        return self._executor
+
+    async def render(self, avatar: discord.Asset) -> bytes:
+        """Return the bonk gif for `avatar`, rendering it unless it's cached."""
+        if (gif := self.render_cache.get(avatar.key)) is not None:
+            self.render_cache.move_to_end(avatar.key)
+            return gif
+
+        pfp = await avatar.read()
+        gif = await asyncio.get_running_loop().run_in_executor(self.start_executor(), generate_gif, pfp)
+
+        self.render_cache[avatar.key] = gif
+        if len(self.render_cache) > RENDER_CACHE_SIZE:
+            self.render_cache.popitem(last=False)
+
+        return gif
 
     @commands.command()
     @commands.max_concurrency(3)
     async def bonk(self, ctx: commands.Context, member: discord.User) -> None:
         """Sends gif of mentioned member being "bonked" by Yoda."""
-        pfp = await member.avatar.read()
+        avatar = member.avatar or member.default_avatar
         created_at = ctx.message.created_at.strftime("%Y-%m-%d_%H-%M")
         out_filename = f"bonk_{member.id}_{created_at}.gif"
-        func = functools.partial(self._generate_gif, pfp)
 
         async with ctx.typing():
-            with futures.ThreadPoolExecutor() as pool:
-                msg = await ctx.send("this will take a sec, wait ok?")
-                out_gif = await asyncio.get_running_loop().run_in_executor(pool, func)
+            msg = await ctx.send("this will take a sec, wait ok?")
+            out_gif = BytesIO(await self.render(avatar))
 
-            out_gif.seek(0)
             await ctx.send(file=discord.File(out_gif, out_filename))
         await msg.edit(content="oh, there it is yay")
         await asyncio.sleep(5)
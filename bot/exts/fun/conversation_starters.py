@@ -1,3 +1,4 @@
+import functools
 import pathlib
 import random
 
@@ -9,8 +10,14 @@ from bot.bot import Bot
 
 FORM_URL = "https://forms.gle/sb2jNbvVcTorNPTX6"
 
-with pathlib.Path("bot/resources/fun/starters.yaml").open("r", encoding="utf8") as f:
-    STARTERS = yaml.load(f, Loader=yaml.FullLoader)
+STARTERS_PATH = pathlib.Path("bot/resources/fun/starters.yaml")
+
+
+@functools.lru_cache(maxsize=None)
+def get_starters() -> list:
+    """Return the conversation starters, parsing them on first use."""
+    with STARTERS_PATH.open("r", encoding="utf8") as f:
+        return yaml.load(f, Loader=yaml.FullLoader)
 
 
 class ConversationStarters(commands.Cog):
@@ -19,7 +26,7 @@ class ConversationStarters(commands.Cog):
 
     @commands.command(name="topic")
     async def topic(self, ctx: commands.Context):
-        random_topic = random.choice(STARTERS)
+        random_topic = random.choice(get_starters())
         topic_embed = discord.Embed(
             description=f"you want to suggest a new topic? [click here]({FORM_URL})"
         )
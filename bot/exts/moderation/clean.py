@@ -1,29 +1,208 @@
+import asyncio
 import logging
 import random
-import re
+import time
 import typing
-from typing import Iterable, Optional
+from datetime import datetime, timedelta
+from io import BytesIO
+from typing import Callable, Dict, Iterable, List, Optional
 
 import discord
 from discord.ext import commands
 
 from bot.bot import Bot
-from bot.constants import Colours, CleanMessages, Roles, Icons
-from bot.database.models import Guild
+from bot.constants import Colours, CleanMessages, Event, Icons, NEGATIVE_REPLIES
+from bot.database.models import MessageLog
+from bot.utils.checks import has_moderation_role
+from bot.utils.converters import Regex
+from bot.utils.message_logs import compress_messages, decompress_messages, format_transcript
+from bot.utils.regex import CaseInsensitivePattern, message_matches
 
 log = logging.getLogger(__name__)
 
 
+# Discord only bulk deletes up to 100 messages at once, and only messages younger than 14 days.
+BULK_DELETE_SIZE = 100
+BULK_DELETE_MAX_AGE = timedelta(days=14)
+
+# Minimum number of seconds between two edits of the progress message.
+PROGRESS_INTERVAL = 5
+
+# Delete requests per second shared by every clean, well under Discord's global limit of 50
+# requests per second so the bot can still do other things while a large clean runs.
+DELETE_RATE = 20
+DELETE_BURST = 10
+
+
+class DeleteBudget:
+    """
+    A token bucket pacing the delete requests of all cleans.
+
+    Channels are cleaned concurrently, and each channel only ever has one delete request in
+    flight, which leaves the per-channel limits to discord.py's route buckets. This budget caps
+    the rate of all of them together so a clean across many channels can't hit the global limit.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a delete request may be made."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CleanProgress:
+    """Counts of a clean operation, reported in its progress message."""
+
+    __slots__ = ("scanned", "deleted", "last_update")
+
+    def __init__(self) -> None:
+        self.scanned = 0
+        self.deleted = 0
+        self.last_update = time.monotonic()
+
+
 class Clean(commands.Cog):
     def __init__(self, bot: Bot) -> None:
         self.bot = bot
-        self.cleaning = False
+
+        # Ongoing cleans, mapping a guild ID to the token of its clean. Cancelling removes the token.
+        self.cleaning: Dict[int, object] = {}
+        self.delete_budget = DeleteBudget(DELETE_RATE, DELETE_BURST)
 
     @property
     def mod_log(self) -> typing.Optional[commands.Cog]:
         """Get currently loaded ModLog cog instance."""
         return self.bot.get_cog("ModLog")
 
+    @staticmethod
+    def _progress_embed(progress: CleanProgress, done: bool = False) -> discord.Embed:
+        return discord.Embed(
+            color=discord.Colour.blurple(),
+            description=(
+                f"{'Cleaned' if done else 'Cleaning'}: {progress.scanned:,} messages scanned, "
+                f"{progress.deleted:,} deleted."
+            ),
+        )
+
+    async def _update_progress(self, message: Optional[discord.Message], progress: CleanProgress) -> None:
+        """Edit the progress message, at most once every `PROGRESS_INTERVAL` seconds."""
+        if message is None or time.monotonic() - progress.last_update < PROGRESS_INTERVAL:
+            return
+
+        progress.last_update = time.monotonic()
+        try:
+            await message.edit(embed=self._progress_embed(progress))
+        except discord.HTTPException:
+            log.debug("Failed to edit the clean progress message.")
+
+    def _ignore_deletes(self, messages: List[discord.Message]) -> None:
+        """Keep the mod log from logging the deletion of `messages`, which the clean log covers."""
+        if self.mod_log is not None:
+            self.mod_log.ignore(Event.message_delete, *(message.id for message in messages))
+
+    async def _delete(self, channel: discord.TextChannel, messages: List[discord.Message]) -> List[discord.Message]:
+        """Delete `messages` from `channel` and return those which were deleted."""
+        if not messages:
+            return []
+
+        if len(messages) == 1:
+            # A single message is deleted on its own, which the mod log would otherwise log.
+            self._ignore_deletes(messages)
+
+        try:
+            # One request for up to 100 messages, or a single delete if there's only one.
+            await self.delete_budget.acquire()
+            await channel.delete_messages(messages)
+        except discord.NotFound:
+            # Some of them were deleted in the meantime, fall back to deleting the rest one by one.
+            return await self._delete_individually(messages)
+
+        return messages
+
+    async def _delete_individually(self, messages: List[discord.Message]) -> List[discord.Message]:
+        """Delete `messages` one at a time, which works regardless of their age."""
+        deleted = []
+        for message in messages:
+            self._ignore_deletes([message])
+            await self.delete_budget.acquire()
+            try:
+                await message.delete()
+            except discord.NotFound:
+                continue
+            deleted.append(message)
+        return deleted
+
+    async def _clean_channel(
+            self,
+            channel: discord.TextChannel,
+            amount: int,
+            predicate: Callable[[discord.Message], bool],
+            is_cancelled: Callable[[], bool],
+            progress: CleanProgress,
+            progress_message: Optional[discord.Message] = None,
+            until_message: Optional[discord.Message] = None,
+    ) -> List[discord.Message]:
+        """
+        Delete the messages matching `predicate` among the last `amount` messages of `channel`.
+
+        The history is only walked once: matching messages are deleted in bulk as soon as 100 of
+        them were found, and messages too old to be bulk deleted are deleted one by one at the end.
+        Return the deleted messages, newest first.
+        """
+        deleted = []
+        batch = []
+        too_old = []
+        bulk_cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+
+        async for message in channel.history(limit=amount):
+            if is_cancelled():
+                break
+
+            # We could use IDs here, however if the message we are looking for gets deleted,
+            # we wouldn't be able to tell that we've passed it. Checking the datetime is more reliable.
+            if until_message and message.created_at < until_message.created_at:
+                break
+
+            progress.scanned += 1
+            if (progress_message and message.id == progress_message.id) or not predicate(message):
+                continue
+
+            if message.created_at < bulk_cutoff:
+                too_old.append(message)
+                continue
+
+            batch.append(message)
+            if len(batch) == BULK_DELETE_SIZE:
+                batch_deleted = await self._delete(channel, batch)
+                deleted += batch_deleted
+                progress.deleted += len(batch_deleted)
+                batch = []
+                await self._update_progress(progress_message, progress)
+
+        if is_cancelled():
+            return deleted
+
+        deleted += await self._delete(channel, batch)
+        if too_old:
+            deleted += await self._delete_individually(too_old)
+
+        return deleted
+
     async def _clean_messages(
             self,
             amount: int,
@@ -31,7 +210,7 @@ class Clean(commands.Cog):
             channels: Iterable[discord.TextChannel],
             bots_only: bool = False,
             user: discord.User = None,
-            regex: Optional[str] = None,
+            regex: Optional[CaseInsensitivePattern] = None,
             until_message: Optional[discord.Message] = None,
     ) -> None:
         """A helper function that does the actual message cleaning."""
@@ -46,27 +225,7 @@ class Clean(commands.Cog):
 
         def predicate_regex(message: discord.Message) -> bool:
             """Check if the regex provided in _clean_messages matches the message content or any embed attributes."""
-            content = [message.content]
-
-            # Add the content for all embed attributes
-            for embed in message.embeds:
-                content.append(embed.title)
-                content.append(embed.description)
-                content.append(embed.footer.text)
-                content.append(embed.author.name)
-                for field in embed.fields:
-                    content.append(field.name)
-                    content.append(field.value)
-
-            # Get rid of empty attributes and turn it into a string
-            content = [attr for attr in content if attr]
-            content = "\n".join(content)
-
-            # Now let's see if there's a regex match
-            if not content:
-                return False
-            else:
-                return bool(re.search(regex.lower(), content.lower()))
+            return message_matches(regex, message)
 
         # Is this an acceptable amount of messages to clean?
         if amount > CleanMessages.message_limit:
@@ -78,8 +237,8 @@ class Clean(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        # Are we already performing a clean?
-        if self.cleaning:
+        # Are we already performing a clean in this guild?
+        if ctx.guild.id in self.cleaning:
             embed = discord.Embed(
                 color=discord.Colour(Colours.soft_red),
                 title=random.choice(NEGATIVE_REPLIES),
@@ -101,65 +260,57 @@ class Clean(commands.Cog):
         # Default to using the invoking context's channel
         if not channels:
             channels = [ctx.channel]
+        channels = list(dict.fromkeys(channels))
 
         # Delete the invocation first
         # self.mod_log.ignore(Event.message_delete, ctx.message.id)
         try:
             await ctx.message.delete()
-        except errors.NotFound:
+        except discord.NotFound:
             # Invocation message has already been deleted
             log.info("Tried to delete invocation message, but it was already deleted.")
 
-        messages = []
-        message_ids = []
-        guilds = await Guild.query.gino.all()
-        server_log_channels = {guild.id: guild.server_log_channel for guild in guilds}
-        server_logs_channel: int = int(server_log_channels.get(str(ctx.guild.id)))
-        self.cleaning = True
-
-        # Find the IDs of the messages to delete. IDs are needed in order to ignore mod log events.
-        for channel in channels:
-            async for message in channel.history(limit=amount):
-
-                # If at any point the cancel command is invoked, we should stop.
-                if not self.cleaning:
-                    return
+        token = object()
+        self.cleaning[ctx.guild.id] = token
+
+        def is_cancelled() -> bool:
+            return self.cleaning.get(ctx.guild.id) is not token
+
+        progress = CleanProgress()
+        progress_message = await ctx.send(embed=self._progress_embed(progress))
+
+        # Clean all channels at once, so the clean takes about as long as the slowest channel.
+        try:
+            results = await asyncio.gather(
+                *(
+                    self._clean_channel(
+                        channel, amount, predicate, is_cancelled, progress, progress_message, until_message
+                    )
+                    for channel in channels
+                ),
+                return_exceptions=True,
+            )
+        finally:
+            if not is_cancelled():
+                del self.cleaning[ctx.guild.id]
 
-                # If we are looking for specific message.
-                if until_message:
-
-                    # we could use ID's here however in case if the message we are looking for gets deleted,
-                    # we won't have a way to figure that out thus checking for datetime should be more reliable
-                    if message.created_at < until_message.created_at:
-                        # means we have found the message until which we were supposed to be deleting.
-                        break
-
-                    # Since we will be using `delete_messages` method of a TextChannel and we need message objects to
-                    # use it as well as to send logs we will start appending messages here instead adding them from
-                    # purge.
-                    messages.append(message)
-
-                # If the message passes predicate, let's save it.
-                if predicate is None or predicate(message):
-                    message_ids.append(message.id)
-
-        self.cleaning = False
-
-        # Now let's delete the actual messages with purge.
-        # self.mod_log.ignore(Event.message_delete, *message_ids)
-        for channel in channels:
-            if until_message:
-                for i in range(0, len(messages), 100):
-                    # while purge automatically handles the amount of messages
-                    # delete_messages only allows for up to 100 messages at once
-                    # thus we need to paginate the amount to always be <= 100
-                    await channel.delete_messages(messages[i:i + 100])
+        messages = []
+        for channel, result in zip(channels, results):
+            if isinstance(result, Exception):
+                log.error(f"Failed to clean channel {channel.id}.", exc_info=result)
+                await ctx.send(f":x: Could not clean {channel.mention}: {result}", delete_after=10)
             else:
-                messages += await channel.purge(limit=amount, check=predicate)
+                messages += result
+        progress.deleted = len(messages)
 
-        # Reverse the list to restore chronological order
+        try:
+            await progress_message.edit(embed=self._progress_embed(progress, done=True), delete_after=10)
+        except discord.HTTPException:
+            log.debug("Failed to edit the clean progress message.")
+
+        # Sort the messages to restore chronological order
         if messages:
-            messages = reversed(messages)
+            messages.sort(key=lambda message: message.created_at)
         else:
             # Can't build an embed, nothing to clean!
             embed = discord.Embed(
@@ -168,42 +319,19 @@ class Clean(commands.Cog):
             )
             await ctx.send(embed=embed, delete_after=10)
             return
-
         # Build the embed and send it
         target_channels = ", ".join(channel.mention for channel in channels)
-        msglogs = b""
-        for message in messages:
-            a = f"{message.author.display_name} ({message.author.id}) {message.created_at} -> {message.content}\n"
-            msglogs += bytes(a, "utf8")
-
-        b=""
-
-        async with self.bot.http_session.post("https://www.toptal.com/developers/hastebin/documents", data=msglogs) as res:
-            b = await res.json()
-        #   Temporarily using Hastebin :| TODO: Uh make ur own web thing
-        #     msglogs.append(
-        #         {
-        #             'id': message.id,
-        #             'author': message.author.id,
-        #             'channel_id': message.channel.id,
-        #             'content': message.content.replace("\0", ""),  # Null chars cause 400.
-        #             'embeds': [embed.to_dict() for embed in message.embeds],
-        #             'attachments': [attachment.url for attachment in message.attachments]
-        #         }
-        #     )
-        #
-        # msglogs = json.dumps({"logs": msglogs})
-        # msglog = await MessageLog.create(
-        #     actor=str(ctx.author.id),
-        #     guild=str(ctx.guild.id),
-        #     inserted_at=datetime.utcnow(),
-        #     messages=msglogs
-        # )
+        message_log = await MessageLog.create(
+            actor=str(ctx.author.id),
+            guild=str(ctx.guild.id),
+            inserted_at=datetime.utcnow(),
+            data=compress_messages(messages),
+        )
 
         message = (
-            f"**{len(message_ids)}** messages deleted in {target_channels} by "
+            f"**{len(messages)}** messages deleted in {target_channels} by "
             f"{ctx.author.mention}\n\n"
-            f"[Message Log](https://www.toptal.com/developers/hastebin/{b['key']})"
+            f"Message log: `{ctx.prefix}clean log {message_log.id}`"
         )
 
         await self.mod_log.send_log_message(
@@ -211,17 +339,17 @@ class Clean(commands.Cog):
             colour=discord.Colour(Colours.soft_red),
             title="Bulk message delete",
             text=message,
-            channel_id=server_logs_channel
+            guild_id=ctx.guild.id
         )
 
     @commands.group(invoke_without_command=True, name="clean", aliases=["clear", "purge"])
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def clean_group(self, ctx: commands.Context) -> None:
         """Commands for cleaning messages in channels."""
         await ctx.send_help(ctx.command)
 
     @clean_group.command(name="user", aliases=["users"])
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def clean_user(
             self,
             ctx: commands.Context,
@@ -233,7 +361,7 @@ class Clean(commands.Cog):
         await self._clean_messages(amount, ctx, user=user, channels=channels)
 
     @clean_group.command(name="all", aliases=["everything"])
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def clean_all(
             self,
             ctx: commands.Context,
@@ -244,7 +372,7 @@ class Clean(commands.Cog):
         await self._clean_messages(amount, ctx, channels=channels)
 
     @clean_group.command(name="bots", aliases=["bot"])
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def clean_bots(
             self,
             ctx: commands.Context,
@@ -255,11 +383,11 @@ class Clean(commands.Cog):
         await self._clean_messages(amount, ctx, bots_only=True, channels=channels)
 
     @clean_group.command(name="regex", aliases=["word", "expression"])
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def clean_regex(
             self,
             ctx: commands.Context,
-            regex: str,
+            regex: Regex,
             amount: Optional[int] = 10,
             channels: commands.Greedy[discord.TextChannel] = None
     ) -> None:
@@ -267,7 +395,7 @@ class Clean(commands.Cog):
         await self._clean_messages(amount, ctx, regex=regex, channels=channels)
 
     @clean_group.command(name="message", aliases=["messages"])
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def clean_message(self, ctx: commands.Context, message: discord.Message) -> None:
         """Delete all messages until certain message, stop cleaning after hitting the `message`."""
         await self._clean_messages(
@@ -277,13 +405,31 @@ class Clean(commands.Cog):
             until_message=message
         )
 
+    @clean_group.command(name="log", aliases=["logs", "transcript"])
+    @has_moderation_role()
+    async def clean_log(self, ctx: commands.Context, log_id: str) -> None:
+        """Send the transcript of the messages deleted by a clean."""
+        message_log = await MessageLog.get(log_id)
+        if message_log is None or message_log.guild != str(ctx.guild.id) or message_log.data is None:
+            await ctx.send(":x: There is no clean log with that ID in this server.")
+            return
+
+        transcript = format_transcript(decompress_messages(message_log.data))
+        await ctx.send(
+            f"Messages deleted by <@{message_log.actor}> on {message_log.inserted_at:%Y-%m-%d %H:%M} UTC.",
+            file=discord.File(BytesIO(transcript.encode("utf8")), f"clean_{log_id}.txt"),
+            allowed_mentions=discord.AllowedMentions.none(),
+        )
+
     @clean_group.command(name="stop", aliases=["cancel", "abort"])
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def clean_cancel(self, ctx: commands.Context) -> None:
         """If there is an ongoing cleaning process, attempt to immediately cancel it."""
-        self.cleaning = False
+        if self.cleaning.pop(ctx.guild.id, None) is None:
+            await ctx.send("There is no ongoing clean in this server.", delete_after=10)
+            return
 
-        embed = Embed(
+        embed = discord.Embed(
             color=discord.Colour.blurple(),
             description="Clean interrupted."
         )
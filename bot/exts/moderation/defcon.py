@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
 
 import discord
@@ -6,8 +6,9 @@ from discord.ext import commands
 from dateutil.relativedelta import relativedelta
 
 from bot.bot import Bot
-from bot.constants import Roles, Colours
-from bot.database.models import Guild
+from bot.constants import Colours
+from bot.utils.checks import has_moderation_role
+from bot.utils.messages import format_user
 
 logger = logging.getLogger(__name__)
 REJECTION_MESSAGE = """
@@ -32,40 +33,48 @@ class DefCon(commands.Cog):
         """Get the currently loaded ModLog cog instance."""
         return self.bot.get_cog("ModLog")
 
-    @commands.Cog.listener()
-    async def on_member_join(self, member: discord.Member):
-        now = datetime.utcnow()
-        if self.shutdowned.get(member.guild.id):
-            if now - member.created_at < (now + self.treshold - now):
-                msg_sent = False
-
-                try:
-                    await member.send(
-                        REJECTION_MESSAGE.format(
-                            user=member.mention, guild=member.guild.name
-                        )
-                    )
-
-                    msg_sent = True
-                except Exception:
-                    logger.exception(
-                        f"Unable to send rejection message to user: {member}"
-                    )
-
-                await member.kick(reason="DEFCON active, user is too new")
-                message = f"{format_user(member)} was denied entry because their account is too new."
-
-                if not message_sent:
-                    message = f"{message}\n\nUnable to send rejection message via DM; they probably have DMs disabled."
-
-                await self.mod_log.send_log_message(
-                    "https://cdn.discordapp.com/emojis/472475292078964738.png",
-                    Colours.soft_red,
-                    "Entry denied",
-                    message,
-                    member.avatar,
-                    Guild.get(member.guild.id).server_log_channel,
+    async def reject(self, member: discord.Member) -> bool:
+        """
+        Kick `member` if the guild is shut down and their account is too new, returning whether they were kicked.
+
+        Called by the MemberJoin cog before anything else is done with new members.
+        """
+        if not self.shutdowned.get(member.guild.id):
+            return False
+
+        now = datetime.now(timezone.utc)
+        if member.created_at + self.treshold <= now:
+            return False
+
+        message_sent = False
+        try:
+            await member.send(
+                REJECTION_MESSAGE.format(
+                    user=member.mention, guild=member.guild.name
                 )
+            )
+
+            message_sent = True
+        except Exception:
+            logger.exception(
+                f"Unable to send rejection message to user: {member}"
+            )
+
+        await member.kick(reason="DEFCON active, user is too new")
+        message = f"{format_user(member)} was denied entry because their account is too new."
+
+        if not message_sent:
+            message = f"{message}\n\nUnable to send rejection message via DM; they probably have DMs disabled."
+
+        await self.mod_log.send_log_message(
+            "https://cdn.discordapp.com/emojis/472475292078964738.png",
+            Colours.soft_red,
+            "Entry denied",
+            message,
+            guild_id=member.guild.id,
+            thumbnail=member.avatar,
+        )
+        return True
 
     @commands.group(name="defcon", aliases=("dc",))
     async def defcon_group(self, ctx: commands.Context):
@@ -73,7 +82,7 @@ class DefCon(commands.Cog):
             await ctx.send_help(ctx.command)
 
     @defcon_group.command()
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def shutdown(self, ctx: commands.Context):
         """Shut down the server by setting send permissions of everyone to False."""
         role = ctx.guild.default_role
@@ -85,7 +94,7 @@ class DefCon(commands.Cog):
         await ctx.send(":white_check_mark::lock:  server locked down")
 
     @defcon_group.command()
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def unshutdown(self, ctx: commands.Context) -> None:
         """Open up the server again by setting send permissions of everyone to None."""
         role = ctx.guild.default_role
@@ -1,18 +1,20 @@
+import asyncio
 import logging
 import textwrap
 import typing as t
 from abc import abstractmethod
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import discord
 from discord.ext.commands import Context
 
 from bot.bot import Bot
-from bot.constants import Colours
+from bot.constants import Colours, Scheduling
 import bot.exts.moderation.infraction._utils as _utils
 from bot.utils import time, scheduling, messages
 from bot.exts.moderation.modlog import ModLog
 from bot.utils.converters import MemberOrUser
+from bot.database.database import db
 from bot.database.models import Infraction
 
 log = logging.getLogger(__name__)
@@ -23,24 +25,52 @@ class InfractionScheduler:
 
     def __init__(self, bot: Bot, supported_infractions: t.Container[str]) -> None:
         self.bot = bot
-        self.scheduler = scheduling.Scheduler(self.__class__.__name__)
-        self.bot.loop.create_task(self.reschedule_infractions(supported_infractions))
+        self.scheduler = scheduling.HeapScheduler(self.__class__.__name__)
+
+        # Only infractions expiring before the end of the current window are kept in the scheduler.
+        self._window_end: t.Optional[datetime] = None
+        self._reschedule_task = self.bot.loop.create_task(self._reschedule_periodically(supported_infractions))
+
+    def cog_unload(self) -> None:
+        """Stop loading new windows and cancel scheduled tasks."""
+        self._reschedule_task.cancel()
+        self.scheduler.cancel_all()
 
     @property
     def mod_log(self) -> ModLog:
         """Get the currently loaded ModLog cog instance."""
         return self.bot.get_cog("ModLog")
 
+    async def _reschedule_periodically(self, supported_infractions: t.Container[str]) -> None:
+        """Load the infractions expiring in the next window, twice per window."""
+        await self.bot.wait_until_database_ready()
+
+        # Ticking twice per window means every infraction is scheduled at least half a window ahead.
+        while True:
+            # A failed window is retried on the next tick rather than ending the loop.
+            try:
+                await self.reschedule_infractions(supported_infractions)
+            except Exception:
+                log.exception("Failed to reschedule infractions for the next window.")
+            await asyncio.sleep(Scheduling.reschedule_window / 2)
+
     async def reschedule_infractions(self, supported_infractions: t.Container[str]) -> None:
-        """Schedule expiration for previous infractions."""
+        """Schedule expiration for infractions expiring within the next window."""
         await self.bot.wait_until_database_ready()
 
-        infractions = [infraction
-                       for infraction in
-                       await Infraction.query.order_by(
-                           Infraction.expiry).gino.all() if infraction.type in supported_infractions and
-                       infraction.active and not infraction.permanent
-                       ]
+        # Move the window first so infractions applied during the query are scheduled on application.
+        window_end = datetime.utcnow() + timedelta(seconds=Scheduling.reschedule_window)
+        self._window_end = window_end
+
+        infractions = await Infraction.query.where(
+            Infraction.active
+        ).where(
+            db.not_(Infraction.permanent)
+        ).where(
+            Infraction.type.in_(supported_infractions)
+        ).where(
+            Infraction.expiry <= window_end
+        ).order_by(Infraction.expiry).gino.all()
 
         to_schedule = [i for i in infractions if i.id not in self.scheduler]
 
@@ -48,18 +78,7 @@ class InfractionScheduler:
             log.trace("Scheduling %r", infraction)
             self.schedule_expiration(infraction)
 
-        # Call ourselves again when the last infraction would expire. This will be the "oldest" infraction we've seen
-        # from the database so far, and new ones are scheduled as part of application.
-        # We make sure to fire this
-        if to_schedule:
-            next_reschedule_point = max(
-                infraction.expiry for infraction in to_schedule
-            )
-            log.trace("Will reschedule remaining infractions at %s", next_reschedule_point)
-
-            self.scheduler.schedule_at(next_reschedule_point, -1, self.reschedule_infractions(supported_infractions))
-
-        log.trace("Done rescheduling")
+        log.trace(f"Done rescheduling {len(to_schedule)} infractions expiring before {window_end}")
 
     async def reapply_infraction(
             self,
@@ -247,25 +266,28 @@ class InfractionScheduler:
         # Check the current active infraction
         log.trace(f"Fetching active {infr_type} infractions for {user}.")
 
-        infractions = [
-            infraction for infraction in await Infraction.query.where(
-                Infraction.type == infr_type,
-                Infraction.user == user.id
-            ).gino.all() if infraction.active
-        ]
-
-        if not infractions:
+        infraction = await Infraction.query.where(
+            Infraction.active
+        ).where(
+            Infraction.guild == str(ctx.guild.id)
+        ).where(
+            Infraction.user == str(user.id)
+        ).where(
+            Infraction.type == infr_type
+        ).gino.first()
+
+        if not infraction:
             log.debug(f"No active {infr_type} infraction found for {user}.")
             await ctx.send(f":x: There's no active {infr_type} infraction for user {user.mention}.")
             return
 
         # Deactivate the infraction and cancel its scheduled expiration task.
-        log_text = await self.deactivate_infraction(infractions[0], send_log=False, notify=notify)
+        log_text = await self.deactivate_infraction(infraction, send_log=False, notify=notify)
 
         log_text["Member"] = messages.format_user(user)
         log_text["Actor"] = ctx.author.mention
         log_content = None
-        id_ = infractions[0].id
+        id_ = infraction.id
         footer = f"ID: {id_}"
 
         # Accordingly display whether the user was successfully notified via DM.
@@ -370,11 +392,8 @@ class InfractionScheduler:
         log.trace(f"Marking infraction {id_} as inactive in the database.")
         await infraction.update(active=False).apply()
 
-        if infraction.expiry:
-            self.scheduler.cancel(infraction.id)
-
-        # Cancel the expiration task.
-        if infraction.expiry is not None:
+        # Cancel the expiration task, if its window has been loaded yet.
+        if infraction.id in self.scheduler:
             self.scheduler.cancel(infraction.id)
 
         # Send a log message to the mod log.
@@ -419,6 +438,12 @@ class InfractionScheduler:
         Marks an infraction expired after the delay from time of scheduling to time of expiration.
         At the time of expiration, the infraction is marked as inactive on the website and the
         expiration task is cancelled.
+        Infractions expiring after the current reschedule window are left for a later window.
         """
         expiry = infraction.expiry
+        if self._window_end is not None and expiry > self._window_end:
+            # It will be picked up by the window it falls in.
+            log.trace(f"Infraction #{infraction.id} expires after the current window, not scheduling yet.")
+            return
+
         self.scheduler.schedule_at(expiry, infraction.id, self.deactivate_infraction(infraction))
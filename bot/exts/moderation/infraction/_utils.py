@@ -69,22 +69,22 @@ async def get_active_infraction(
     """
     logger.trace(f"Checking if {user} has active infractions of type {infr_type}.")
 
-    active_infractions = [
-        infraction for infraction in await Infraction.query.where(
-            Infraction.type == infr_type
-        ).where(
-            Infraction.user == str(user.id)
-        ).where(
-            Infraction.guild == str(user.guild.id)
-        ).gino.all() if infraction.active
-    ]
-
-    if active_infractions:
+    active_infraction = await Infraction.query.where(
+        Infraction.active
+    ).where(
+        Infraction.guild == str(ctx.guild.id)
+    ).where(
+        Infraction.user == str(user.id)
+    ).where(
+        Infraction.type == infr_type
+    ).gino.first()
+
+    if active_infraction:
         # Checks to see if the moderator should be told there is an active infraction
         if send_msg:
             logger.trace(f"{user} has active infractions of type {infr_type}.")
-            await send_active_infraction_message(ctx, active_infractions[0])
-        return active_infractions[0]
+            await send_active_infraction_message(ctx, active_infraction)
+        return active_infraction
     else:
         logger.trace(f"{user} does not have active infractions of type {infr_type}.")
 
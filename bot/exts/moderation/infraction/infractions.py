@@ -7,9 +7,10 @@ from discord.ext import commands
 
 from bot.bot import Bot
 from bot.constants import Roles, Event
-from bot.database.models import Guild, Infraction
+from bot.database.models import Infraction
 from bot.exts.moderation.modlog import ModLog
 from bot.utils.converters import Duration, Expiry, MemberOrUser, FetchedMember
+from bot.utils.guild_settings import guild_settings
 from bot.exts.moderation.infraction import _utils
 from bot.exts.moderation.infraction._scheduler import InfractionScheduler
 from bot.utils.messages import format_user
@@ -34,33 +35,27 @@ class Infractions(InfractionScheduler, commands.Cog):
         return self.bot.get_cog("ModLog")
 
     async def get_muted_role(self, guild_id: int) -> discord.Role:
-        guild_db = await Guild.get(str(guild_id))
+        guild_db = await guild_settings.fetch(guild_id)
         guild = await self.bot.fetch_guild(guild_id)
         muted_role = guild.get_role(int(guild_db.muted_role))
         return muted_role
 
     async def get_voiceban_role(self, guild_id: int) -> discord.Role:
-        guild_db = await Guild.get(str(guild_id))
+        guild_db = await guild_settings.fetch(guild_id)
         guild = await self.bot.fetch_guild(guild_id)
         voiceban_role = guild.get_role(int(guild_db.voiceban_role))
         return voiceban_role
 
-    @commands.Cog.listener()
-    async def on_member_join(self, member: discord.Member) -> None:
-        """Reapply active mute infractions for returning members."""
-        active_mutes = [
-            infraction for infraction in
-            await Infraction.query.where(
-                Infraction.type == "mute" and
-                Infraction.user == member.id
-            ).gino.all() if infraction.active
-        ]
-
-        if active_mutes:
-            reason = f"Re-applying active mute: {active_mutes[0].id}"
-            action = member.add_roles(await self.get_muted_role(member.guild.id), reason=reason)
-
-            await self.reapply_infraction(active_mutes[0], action)
+    async def reapply_mute(self, member: discord.Member, active_mute: Infraction) -> None:
+        """
+        Reapply the `active_mute` infraction of a returning member.
+
+        Active mutes are looked up by the MemberJoin cog, which batches the lookups of members joining together.
+        """
+        reason = f"Re-applying active mute: {active_mute.id}"
+        action = member.add_roles(await self.get_muted_role(member.guild.id), reason=reason)
+
+        await self.reapply_infraction(active_mute, action)
 
     # region: Permanent infractions
 
@@ -155,13 +155,13 @@ class ModManagement(commands.Cog):
 
         # Re-schedule infraction if the expiration has been updated
         if 'expires_at' in request_data:
-            # A scheduled task should only exist if the old infraction wasn't permanent
-            if infraction.expires_at:
-                self.infractions_cog.scheduler.cancel(new_infraction['id'])
+            # A scheduled task only exists if the old infraction wasn't permanent and expires in the current window
+            if infraction.id in self.infractions_cog.scheduler:
+                self.infractions_cog.scheduler.cancel(infraction.id)
 
             # If the infraction was not marked as permanent, schedule a new expiration task
             if request_data['expires_at']:
-                self.infractions_cog.schedule_expiration(new_infraction)
+                self.infractions_cog.schedule_expiration(infraction)
 
             log_text += f"""
                 Previous expiry: {until_expiration(prev_expiry) or "Permanent"}
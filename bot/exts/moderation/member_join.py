@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import typing as t
+
+import discord
+from discord.ext import commands
+
+from bot.bot import Bot
+from bot.database.database import db
+from bot.database.models import Infraction
+from bot.utils import scheduling
+
+log = logging.getLogger(__name__)
+
+MuteKey = t.Tuple[str, str]
+
+
+class MuteLookup:
+    """
+    Look up the active mutes of joining members, batching the lookups made in the same event loop iteration.
+
+    The first lookup of an iteration schedules a query which runs on the next one, by which time
+    the handlers of every join dispatched alongside it have asked for their member too, so a raid
+    costs one query per iteration rather than one per member.
+    """
+
+    def __init__(self) -> None:
+        self._pending: t.Dict[MuteKey, asyncio.Future] = {}
+        self.queries = 0
+
+    async def get(self, member: discord.Member) -> t.Optional[Infraction]:
+        """Return the active mute of `member` in their guild, if they have one."""
+        key = (str(member.guild.id), str(member.id))
+
+        future = self._pending.get(key)
+        if future is None:
+            if not self._pending:
+                scheduling.create_task(self._flush(), name="mute_lookup_flush")
+            future = self._pending[key] = asyncio.get_running_loop().create_future()
+            future.add_done_callback(self._retrieve_exception)
+
+        return await asyncio.shield(future)
+
+    @staticmethod
+    def _retrieve_exception(future: asyncio.Future) -> None:
+        # The joins waiting on the future may all have been cancelled, and they're the ones logging its failure.
+        # Mark the exception as retrieved so asyncio doesn't also complain about it never being retrieved.
+        if not future.cancelled():
+            future.exception()
+
+    async def _flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        self.queries += 1
+
+        try:
+            mutes = await Infraction.query.where(
+                Infraction.active
+            ).where(
+                Infraction.type == "mute"
+            ).where(
+                db.tuple_(Infraction.guild, Infraction.user).in_(list(pending))
+            ).gino.all()
+        except Exception as e:
+            # Each waiting join logs the failure.
+            for future in pending.values():
+                future.set_exception(e)
+            return
+
+        found = {(mute.guild, mute.user): mute for mute in mutes}
+        for key, future in pending.items():
+            future.set_result(found.get(key))
+
+
+class MemberJoin(commands.Cog):
+    """
+    Handle members joining, in order.
+
+    DefCon gets to reject the member first, and nothing else happens to members it kicked.
+    Returning members then get their active mute reapplied, and new members are welcomed.
+    """
+
+    def __init__(self, bot: Bot) -> None:
+        self.bot = bot
+        self.mute_lookup = MuteLookup()
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member) -> None:
+        defcon = self.bot.get_cog("DefCon")
+        if defcon is not None and await defcon.reject(member):
+            return
+
+        infractions = self.bot.get_cog("Infractions")
+        if infractions is not None:
+            try:
+                active_mute = await self.mute_lookup.get(member)
+                if active_mute:
+                    await infractions.reapply_mute(member, active_mute)
+            except Exception:
+                log.exception(f"Failed to reapply the active mute of {member.id} in {member.guild.id}.")
+
+        verification = self.bot.get_cog("Verification")
+        if verification is not None:
+            verification.welcome(member)
+
+
+def setup(bot: Bot) -> None:
+    """load the MemberJoin cog"""
+    bot.add_cog(MemberJoin(bot))
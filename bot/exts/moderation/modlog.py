@@ -1,20 +1,34 @@
 from datetime import datetime
 import typing
-import difflib
-import itertools
 
 import discord
 from discord.ext import commands
 
 from bot.bot import Bot
 from bot.constants import Colours, Icons, Event
-from bot.database.models import Guild
+from bot.utils import scheduling
+from bot.utils.guild_settings import guild_settings
+from bot.utils.log_queue import LogQueue
+from bot.utils.message_store import MessageRecord, MessageStore
+from bot.utils.messages import clean_content
+from bot.utils.word_diff import format_edit
+
+# Seconds a log may wait in the queue for other logs to be batched with it.
+LOG_FLUSH_INTERVAL = 2
 
 
 class ModLog(commands.Cog):
     def __init__(self, bot: Bot):
         self.bot = bot
         self._ignored = {event: [] for event in Event}
+        self.log_queue = LogQueue(bot, flush_interval=LOG_FLUSH_INTERVAL)
+        self.message_store = MessageStore()
+        self.message_store.start(bot.loop)
+
+    def cog_unload(self) -> None:
+        """Deliver any queued logs and write out messages waiting to be spilled to the database."""
+        scheduling.create_task(self.log_queue.close(), name="modlog_queue_close")
+        scheduling.create_task(self.message_store.close(), name="modlog_message_store_close")
 
     def ignore(self, event: Event, *items: int) -> None:
         """Add event to ignored events to suppress log emission."""
@@ -37,17 +51,14 @@ class ModLog(commands.Cog):
         additional_embeds: typing.Optional[typing.List[discord.Embed]] = None,
         timestamp_override: typing.Optional[datetime] = None,
         footer: typing.Optional[str] = None,
-    ) -> typing.Optional[commands.Context]:
-        """Generate log embed and send to logging channel."""
+    ) -> None:
+        """Generate log embed and queue it for delivery to the logging channel."""
         # Truncate string directly here to avoid removing newlines
 
         if not channel_id:
-            guilds = await Guild.query.gino.all()
-            server_log_channels = {guild.id: guild.server_log_channel for guild in guilds}
-            server_logs_channel: int = int(server_log_channels.get(str(guild_id), 0))
-            if server_logs_channel <= 0:
+            channel_id = await guild_settings.get_log_channel_id(guild_id)
+            if not channel_id:
                 return
-            channel_id = server_logs_channel
 
         embed = discord.Embed(
             description=text[:4093] + "..." if len(text) > 4096 else text
@@ -75,119 +86,124 @@ class ModLog(commands.Cog):
         if content and len(content) > 2000:
             content = content[: 2000 - 3] + "..."
 
+        self.log_queue.put(
+            channel_id,
+            [embed, *(additional_embeds or ())],
+            content=content,
+            files=files,
+        )
+
+    def _get_member(self, guild_id: int, user_id: int) -> typing.Optional[discord.Member]:
+        guild = self.bot.get_guild(guild_id)
+        return guild.get_member(user_id) if guild else None
+
+    def _channel_name(self, channel_id: int) -> str:
         channel = self.bot.get_channel(channel_id)
-        log_message = await channel.send(content=content, embed=embed, files=files)
+        if channel is not None and channel.category:
+            return f"{channel.category}/<#{channel_id}>"
+        return f"<#{channel_id}>"
 
-        if additional_embeds:
-            for additional_embed in additional_embeds:
-                await channel.send(embed=additional_embed)
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message) -> None:
+        """Store messages so their deletion or edit can be logged after the library's cache forgot them."""
+        if message.guild and not message.author.bot:
+            self.message_store.add(message)
 
-        return await self.bot.get_context(
-            log_message
-        )  # Optionally return for use with antispam
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self.message_store.remove_guild(guild.id)
 
     @commands.Cog.listener()
-    async def on_message_delete(self, message: discord.Message):
-        channel = message.channel
-        author = message.author
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent) -> None:
+        if payload.guild_id is not None:
+            self.message_store.discard(payload.guild_id, payload.message_ids)
 
-        if not message.guild:
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent) -> None:
+        if payload.guild_id is None:
             return
 
-        if message.author.bot:
-            return
+        record = await self.message_store.pop(payload.guild_id, payload.message_id)
 
-        if message.id in self._ignored[Event.message_delete]:
-            self._ignored[Event.message_delete].remove(message.id)
+        if payload.message_id in self._ignored[Event.message_delete]:
+            self._ignored[Event.message_delete].remove(payload.message_id)
             return
 
-        log = message.content
-        footer = f"Author id: {message.author.id} | Message id: {message.id}"
+        if record is None:
+            # Messages sent before the store was loaded may still be in the library's cache.
+            message = payload.cached_message
+            if message is None or message.author.bot:
+                return
+            record = MessageRecord.from_message(message)
+
+        author = self._get_member(payload.guild_id, record.author_id)
+
+        log = record.content
+        if record.attachments:
+            log += "\n" + "\n".join(f"[attachment]({url})" for url in record.attachments)
+        footer = f"Author id: {record.author_id} | Message id: {record.id}"
         log_msg = f"""
-            **Message deleted by {author.mention} in <#{channel.id}>**
+            **Message deleted by <@{record.author_id}> in <#{record.channel_id}>**
             {log}
             """
 
         await self.send_log_message(
             Icons.message_delete,
             Colours.soft_red,
-            message.author.name,
+            author.name if author else record.author_name,
             log_msg,
-            guild_id=message.guild.id,
-            thumbnail=message.author.avatar,
+            guild_id=payload.guild_id,
+            thumbnail=author.avatar if author else None,
             footer=footer,
         )
 
     @commands.Cog.listener()
-    async def on_message_edit(
-        self, msg_before: discord.Message, msg_after: discord.Message
-    ):
-        if (
-            not msg_before.guild
-            or msg_before.author.bot
-        ):
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent) -> None:
+        # Edits which only change embeds, such as link previews loading, come without content.
+        content = payload.data.get("content")
+        if payload.guild_id is None or content is None:
+            return
+        # Bots' messages aren't stored, so don't look for them in the database either.
+        if payload.data.get("author", {}).get("bot"):
             return
 
-        channel = msg_before.channel
-        channel_name = (
-            f"{channel.category}/<#{channel.id}>"
-            if channel.category
-            else f"#{channel.name}"
-        )
+        record = await self.message_store.update(payload.guild_id, payload.message_id, content)
+        if record is None:
+            message = payload.cached_message
+            if message is None or message.author.bot:
+                return
+            record = MessageRecord.from_message(message)
 
-        cleaned_contents = (
-            discord.utils.escape_markdown(str(msg.clean_content)).split()
-            for msg in (msg_before, msg_after)
-        )
-        # Getting the difference per words and group them by type - add, remove, same
-        # Note that this is intended grouping without sorting
-        diff = difflib.ndiff(*cleaned_contents)
-        diff_groups = tuple(
-            (diff_type, tuple(s[2:] for s in diff_words))
-            for diff_type, diff_words in itertools.groupby(diff, key=lambda s: s[0])
-        )
+        # Mentions are resolved before diffing, the way the message is shown in the client.
+        guild = self.bot.get_guild(payload.guild_id)
+        clean_before, clean_after = clean_content(guild, record.content), clean_content(guild, content)
+        if clean_before == clean_after:
+            return
 
-        content_before: t.List[str] = []
-        content_after: t.List[str] = []
-
-        for index, (diff_type, words) in enumerate(diff_groups):
-            sub = ' '.join(words)
-            if diff_type == '-':
-                content_before.append(f"[{sub}](http://o.hi)")
-            elif diff_type == '+':
-                content_after.append(f"[{sub}](http://o.hi)")
-            elif diff_type == ' ':
-                if len(words) > 2:
-                    sub = (
-                        f"{words[0] if index > 0 else ''}"
-                        " ... "
-                        f"{words[-1] if index < len(diff_groups) - 1 else ''}"
-                    )
-                content_before.append(sub)
-                content_after.append(sub)
-
-        # print(" ".join(content_before))
-        # print(" ".join(content_after))
+        author = self._get_member(payload.guild_id, record.author_id)
+        content_before, content_after = format_edit(
+            discord.utils.escape_markdown(clean_before), discord.utils.escape_markdown(clean_after)
+        )
 
         log = (
-            f"**before**: {' '.join(content_before)}\n"
-            f"**after**: {' '.join(content_after)}\n"
+            f"**before**: {content_before}\n"
+            f"**after**: {content_after}\n"
             "\n"
-            f"[jump url]({msg_after.jump_url})\n"
+            f"[jump url](https://discord.com/channels/{payload.guild_id}/{record.channel_id}/{record.id})\n"
         )
-        footer = f"Author id: {msg_after.author.id} | Message id: {msg_after.id}"
+        footer = f"Author id: {record.author_id} | Message id: {record.id}"
         log_msg = f"""
-              **Message edited by {msg_after.author.mention} in {channel_name}**
+              **Message edited by <@{record.author_id}> in {self._channel_name(record.channel_id)}**
               {log}
               """
 
         await self.send_log_message(
             Icons.message_edit,
             Colours.orange,
-            msg_after.author.name,
+            author.name if author else record.author_name,
             log_msg,
-            guild_id=msg_before.guild.id,
-            thumbnail=msg_after.author.avatar,
+            guild_id=payload.guild_id,
+            thumbnail=author.avatar if author else None,
             footer=footer,
         )
 
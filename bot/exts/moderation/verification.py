@@ -1,28 +1,63 @@
+import asyncio
 import logging
+from typing import Optional
 
 import discord
 from discord.ext import commands
 
 from bot.bot import Bot
+from bot.constants import MemberJoin as MemberJoinConfig
+from bot.utils import scheduling
 
 logger = logging.getLogger(__name__)
 
 
 class Verification(commands.Cog):
+    """
+    Welcome new members with a DM.
+
+    DMs are queued and sent by a single worker at most `welcome_dm_rate` times a second, or as fast
+    as possible if it isn't positive, so a raid can't exhaust the rate limits shared with everything
+    else. Once `welcome_dm_backlog` DMs are waiting, further members aren't welcomed. Joins are
+    handled by the MemberJoin cog.
+    """
+
     def __init__(self, bot: Bot) -> None:
         self.bot = bot
+        self._welcome_queue = asyncio.Queue(maxsize=MemberJoinConfig.welcome_dm_backlog)
+        self._sender: Optional[asyncio.Task] = scheduling.create_task(
+            self.send_welcome_messages(), name="welcome_dm_sender", event_loop=bot.loop
+        )
+
+    def cog_unload(self) -> None:
+        """Stop sending welcome DMs, dropping any which are still queued."""
+        self._sender.cancel()
 
-    @commands.Cog.listener()
-    async def on_member_join(self, member: discord.Member) -> None:
+    def welcome(self, member: discord.Member) -> None:
+        """Queue a welcome DM for `member`."""
         if member.bot:
-            logger.info(
-                f"a fellow bot has joined, {member.id} joined {member.guild.name}"
-            )
-        else:
-            logger.info(f"{member.id} joined {member.guild.name}")
-            await member.send(
-                f"Hey {member.mention}, thanks for joining {member.guild.name}"
-            )
+            logger.info(f"a fellow bot has joined, {member.id} joined {member.guild.name}")
+            return
+
+        logger.info(f"{member.id} joined {member.guild.name}")
+        try:
+            self._welcome_queue.put_nowait(member)
+        except asyncio.QueueFull:
+            logger.warning(f"Welcome DM backlog is full, not welcoming {member.id} to {member.guild.name}.")
+
+    async def send_welcome_messages(self) -> None:
+        """Send queued welcome DMs, no faster than the configured rate."""
+        while True:
+            member = await self._welcome_queue.get()
+            try:
+                await member.send(f"Hey {member.mention}, thanks for joining {member.guild.name}")
+            except discord.HTTPException:
+                logger.info(f"Unable to send a welcome DM to {member.id}, they probably have DMs disabled.")
+
+            # The rate may be changed by a config reload, 0 or less turns the throttle off.
+            rate = MemberJoinConfig.welcome_dm_rate
+            if rate > 0:
+                await asyncio.sleep(1 / rate)
 
 
 def setup(bot: Bot) -> None:
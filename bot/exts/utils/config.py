@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+import discord
+from discord.ext import commands
+
+from bot import constants
+from bot.bot import Bot
+from bot.constants import ConfigError, ConfigWatcher
+from bot.utils import scheduling
+from bot.utils.checks import has_moderation_role
+
+log = logging.getLogger(__name__)
+
+# Settings which are only read at startup, by section. None stands for the whole section.
+RESTART_ONLY = {
+    "Bot": {"token", "sentry_dsn"},
+    "Database": None,
+    "Logging": {"json"},
+    "MemberJoin": {"welcome_dm_backlog"},
+    "Metrics": {"enabled", "host", "port"},
+    "Startup": None,
+}
+
+
+def _needs_restart(section: str, key: str) -> bool:
+    """Return True if changing `key` of `section` only takes effect after a restart."""
+    if section not in RESTART_ONLY:
+        return False
+    keys = RESTART_ONLY[section]
+    return keys is None or key in keys
+
+
+class Config(commands.Cog):
+    """Reload the configuration without restarting the bot."""
+
+    def __init__(self, bot: Bot) -> None:
+        self.bot = bot
+        self._mtime = self._config_mtime()
+        self._watcher: Optional[asyncio.Task] = None
+        self._update_watcher()
+
+    def cog_unload(self) -> None:
+        """Stop watching the configuration file."""
+        if self._watcher is not None:
+            self._watcher.cancel()
+
+    @staticmethod
+    def _config_mtime() -> Optional[float]:
+        try:
+            return os.stat(constants.CONFIG_PATH).st_mtime
+        except OSError:
+            return None
+
+    def _update_watcher(self) -> None:
+        """Start or stop watching the configuration file, depending on whether it's enabled."""
+        if ConfigWatcher.enabled and self._watcher is None:
+            self._watcher = scheduling.create_task(self.watch_config(), name="config_watcher", event_loop=self.bot.loop)
+        elif not ConfigWatcher.enabled and self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+
+    def reload(self) -> dict:
+        """
+        Reload the configuration and notify cogs through the `config_reload` event.
+
+        Raise a `ConfigError` and leave the configuration untouched if the new one is invalid.
+        """
+        self._mtime = self._config_mtime()
+        changes = constants.reload_config()
+        self.bot.dispatch("config_reload", changes)
+        return changes
+
+    async def watch_config(self) -> None:
+        """Reload the configuration whenever its file is modified."""
+        while True:
+            await asyncio.sleep(ConfigWatcher.interval)
+
+            if self._config_mtime() == self._mtime:
+                continue
+
+            log.info("Configuration file changed, reloading it.")
+            try:
+                changes = self.reload()
+            except ConfigError:
+                log.exception("Configuration file changed but could not be reloaded.")
+                continue
+
+            restart_only = [
+                f"{section}.{key}" for section, changed in changes.items() for key in changed
+                if _needs_restart(section, key)
+            ]
+            if restart_only:
+                log.warning(f"Changes to {', '.join(restart_only)} will only take effect after a restart.")
+
+    @commands.Cog.listener()
+    async def on_config_reload(self, changes: dict) -> None:
+        self._update_watcher()
+
+    @commands.group(name="config", aliases=("cfg",), invoke_without_command=True)
+    @has_moderation_role()
+    async def config_group(self, ctx: commands.Context) -> None:
+        """Manage the bot's configuration."""
+        await ctx.send_help(ctx.command)
+
+    @config_group.command(name="reload")
+    @has_moderation_role()
+    async def reload_command(self, ctx: commands.Context) -> None:
+        """Reload the configuration file, applying its changes without a restart."""
+        start = time.perf_counter()
+        try:
+            changes = self.reload()
+        except ConfigError as e:
+            await ctx.send(f":x: The configuration was not reloaded: {e}")
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+
+        embed = discord.Embed(
+            title="Configuration reloaded",
+            description=f"Took {elapsed:.1f} ms, {len(changes) or 'no'} sections changed.",
+            colour=discord.Colour.blurple(),
+        )
+        for section, changed in list(changes.items())[:25]:
+            value = ", ".join(
+                f"`{key}` (needs a restart)" if _needs_restart(section, key) else f"`{key}`" for key in changed
+            )
+            embed.add_field(name=section, value=value, inline=False)
+
+        await ctx.send(embed=embed)
+
+
+def setup(bot: Bot) -> None:
+    """load the Config cog"""
+    bot.add_cog(Config(bot))
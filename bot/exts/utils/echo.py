@@ -6,7 +6,7 @@ from discord.ext.commands.converter import TextChannelConverter
 from discord import Embed, TextChannel
 
 from bot.bot import Bot
-from bot.constants import Roles
+from bot.utils.checks import has_moderation_role
 
 
 class EchoCommands(commands.Cog):
@@ -19,7 +19,7 @@ class EchoCommands(commands.Cog):
         self.bot = bot
 
     @commands.command(name="echo", aliases=("print",))
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def echo_command(
         self, ctx: commands.Context, channel: Optional[TextChannelConverter], *, text: str
     ) -> None:
@@ -32,7 +32,7 @@ class EchoCommands(commands.Cog):
             await channel.send(text)
 
     @commands.command(name="embed")
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def embed_command(
         self,
         ctx: commands.Context,
@@ -9,8 +9,9 @@ from discord.ext import commands
 from bot import exts
 from bot.bot import Bot
 from bot.constants import Roles
+from bot.utils.checks import has_moderation_role
 from bot.utils.converters import Extension
-from bot.utils.extensions import EXTENSIONS
+from bot.utils.extensions import get_extensions
 from bot.utils.pagination import LinePaginator
 
 log = logging.getLogger(__name__)
@@ -40,7 +41,7 @@ class Extensions(commands.Cog):
         await ctx.send_help(ctx.command)
 
     @extensions_group.command()
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def list(self, ctx: commands.Context):
         """
          Get a list of all extensions, including their loaded status.
@@ -76,7 +77,7 @@ class Extensions(commands.Cog):
             return
 
         if "*" in extensions or "**" in extensions:
-            extensions = set(EXTENSIONS) - set(self.bot.extensions.keys())
+            extensions = [ext for ext in get_extensions() if ext not in self.bot.extensions]
 
         msg = self.batch_manage(Action.LOAD, *extensions)
         await ctx.send(msg)
@@ -116,7 +117,7 @@ class Extensions(commands.Cog):
             return
 
         if "**" in extensions:
-            extensions = EXTENSIONS
+            extensions = get_extensions()
         elif "*" in extensions:
             extensions = set(self.bot.extensions.keys()) | set(extensions)
             extensions.remove("*")
@@ -129,7 +130,7 @@ class Extensions(commands.Cog):
         """Return a mapping of extension names and statuses to their categories."""
         categories = {}
 
-        for ext in EXTENSIONS:
+        for ext in get_extensions():
             if ext in self.bot.extensions:
                 status = ":green_circle:"
             else:
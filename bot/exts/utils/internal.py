@@ -4,10 +4,13 @@ from os import utime
 from collections import Counter
 
 import discord
+from aiohttp import web
 from discord.ext import commands
 
 from bot.bot import Bot
-from bot.constants import Roles
+from bot.constants import Metrics
+from bot.utils import command_stats, metrics, scheduling
+from bot.utils.checks import has_moderation_role
 
 logger = logging.getLogger(__name__)
 
@@ -25,27 +28,72 @@ class Internals(commands.Cog):
         self.command_usage_total = 0
         self.socket_since: utime = datetime.utcnow()
 
+        metrics.scheduled_tasks.set_function(self._scheduler_sizes)
+        metrics.log_queue_depth.set_function(self._log_queue_depth)
+
+        self._metrics_runner = None
+        if Metrics.enabled:
+            scheduling.create_task(self.start_metrics_server(), event_loop=self.bot.loop)
+
+    def cog_unload(self) -> None:
+        """Stop serving metrics."""
+        if self._metrics_runner:
+            scheduling.create_task(self._metrics_runner.cleanup(), event_loop=self.bot.loop)
+
+    def _scheduler_sizes(self) -> dict:
+        """Return the number of tasks held by the scheduler of each cog which has one."""
+        return {
+            (name,): len(cog.scheduler)
+            for name, cog in self.bot.cogs.items()
+            if isinstance(getattr(cog, "scheduler", None), scheduling.Scheduler)
+        }
+
+    def _log_queue_depth(self) -> int:
+        mod_log = self.bot.get_cog("ModLog")
+        return mod_log.log_queue.depth if mod_log else 0
+
+    async def start_metrics_server(self) -> None:
+        """Serve the metrics registry in the Prometheus text format."""
+        app = web.Application()
+        app.router.add_get("/metrics", self.metrics_handler)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, Metrics.host, Metrics.port).start()
+        except OSError:
+            logger.exception(f"Could not serve metrics on {Metrics.host}:{Metrics.port}.")
+            await runner.cleanup()
+            return
+
+        self._metrics_runner = runner
+        logger.info(f"Serving metrics on http://{Metrics.host}:{Metrics.port}/metrics")
+
+    async def metrics_handler(self, request: web.Request) -> web.Response:
+        return web.Response(text=metrics.registry.render(), content_type="text/plain", charset="utf-8")
+
     @commands.Cog.listener()
-    async def on_socket_response(self, msg: dict) -> None:
+    async def on_socket_event_type(self, event_type: str) -> None:
         """When a websocket event is received, increase our counters."""
-        if event_type := msg.get("t"):
-            self.socket_event_total += 1
-            self.socket_events[event_type] += 1
+        self.socket_event_total += 1
+        self.socket_events[event_type] += 1
+        metrics.gateway_events.inc(event=event_type)
 
     @commands.Cog.listener()
     async def on_command(self, ctx: commands.Context):
         self.command_usage_total += 1
         self.command_usages[ctx.command.name] += 1
+        metrics.command_invocations.inc(command=ctx.command.qualified_name)
 
     @commands.group(name="internal", aliases=["int"])
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def internal_group(self, ctx: commands.context):
         """Internal commands. Top secret!"""
         if not ctx.invoked_subcommand:
             await ctx.send("invalid use of internal")
 
     @internal_group.command(name="socketstats", aliases=("socket", "stats"))
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def socketstats(self, ctx: commands.Context) -> None:
         """Fetch information on the socket events received from Discord."""
         running_s = (datetime.utcnow() - self.socket_since).total_seconds()
@@ -64,7 +112,7 @@ class Internals(commands.Cog):
         await ctx.send(embed=stats_embed)
 
     @internal_group.command(name="commandstats", aliases=("cmdstats",))
-    @commands.has_any_role(*Roles.moderation_roles)
+    @has_moderation_role()
     async def commandstats(self, ctx: commands.Context) -> None:
         """Get command usage information"""
         running_s = (datetime.utcnow() - self.socket_since).total_seconds()
@@ -84,6 +132,48 @@ class Internals(commands.Cog):
 
         await ctx.send(embed=command_stats_embed)
 
+    @internal_group.command(name="guildcache", aliases=("cachestats",))
+    @has_moderation_role()
+    async def guildcache(self, ctx: commands.Context) -> None:
+        """Get guild settings cache hit and miss counts"""
+        cache = self.bot.guild_settings
+        lookups = cache.hits + cache.misses
+        hit_rate = cache.hits / lookups if lookups else 0
+
+        cache_embed = discord.Embed(
+            title="Guild settings cache",
+            description=f"{len(cache):,} guilds cached, {hit_rate:.2%} hit rate.",
+            color=discord.Color.blurple(),
+        )
+        cache_embed.add_field(name="Hits", value=f"{cache.hits:,}", inline=True)
+        cache_embed.add_field(name="Misses", value=f"{cache.misses:,}", inline=True)
+
+        await ctx.send(embed=cache_embed)
+
+    @internal_group.command(name="latency", aliases=("slow",))
+    @has_moderation_role()
+    async def latency(self, ctx: commands.Context) -> None:
+        """Get the slowest commands by p95 wall time"""
+        rows = sorted(self.bot.command_stats.summary(), key=lambda row: row["p95"], reverse=True)
+
+        latency_embed = discord.Embed(
+            title="Command latency",
+            description=f"Over the last {command_stats.SAMPLE_SIZE:,} invocations of each command.",
+            color=discord.Color.blurple(),
+        )
+
+        for row in rows[:25]:
+            latency_embed.add_field(
+                name=f"{row['command']} ({row['count']:,})",
+                value=(
+                    f"p50 {row['p50'] * 1000:.0f}ms, p95 {row['p95'] * 1000:.0f}ms, p99 {row['p99'] * 1000:.0f}ms\n"
+                    f"avg db {row['db'] * 1000:.0f}ms, http {row['http'] * 1000:.0f}ms"
+                ),
+                inline=False,
+            )
+
+        await ctx.send(embed=latency_embed)
+
 
 def setup(bot: Bot) -> None:
     """load the Internals cog"""
@@ -7,7 +7,7 @@ from discord.ext import commands
 from bot.bot import Bot
 from bot.constants import Channels, Roles
 
-DESCRIPTIONS = ("Command proccesing time", "API ping", "Bot latency")
+DESCRIPTIONS = ("Command proccesing time", "API ping", "Bot latency", "Event loop lag")
 ROUND_LATENCY = 3
 
 
@@ -36,10 +36,11 @@ class Latency(commands.Cog):
 
         api_ping = f"{(end_time - start_time) * 1000:.{ROUND_LATENCY}f} ms"
         discord_ping = f"{self.bot.latency * 1000:.{ROUND_LATENCY}f} ms"
+        loop_lag = f"{self.bot.loop_monitor.lag * 1000:.{ROUND_LATENCY}f} ms"
 
         embed = Embed(title="Pong!")
 
-        for desc, latency in zip(DESCRIPTIONS, [bot_ping, api_ping, discord_ping]):
+        for desc, latency in zip(DESCRIPTIONS, [bot_ping, api_ping, discord_ping, loop_lag]):
             embed.add_field(name=desc, value=latency, inline=False)
 
         await message.edit(embed=embed, content="")
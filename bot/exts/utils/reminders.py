@@ -1,24 +1,28 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 import typing as t
 import random
 import asyncio
+import contextlib
 import textwrap
+import time
 
 import discord
 from discord.ext import commands
 
 from bot.bot import Bot
 from bot.utils.messages import send_denial
-from bot.utils.scheduling import Scheduler
+from bot.utils.scheduling import HeapScheduler
 from bot.utils.pagination import LinePaginator
 from bot.database.models import Reminder
 from bot.utils.converters import Duration
-from bot.constants import POSITIVE_REPLIES, Icons
+from bot.constants import POSITIVE_REPLIES, Icons, Scheduling
 from bot.utils.time import discord_timestamp, TimestampFormats
 
 log = logging.getLogger(__name__)
 MAXIMUM_REMINDERS = 100
+# Maximum number of concurrent REST fetches while validating reminders on reschedule.
+VALIDATION_CONCURRENCY = 10
 
 
 class Reminders(commands.Cog):
@@ -27,33 +31,72 @@ class Reminders(commands.Cog):
     def __init__(self, bot: Bot) -> None:
         self.bot = bot
 
-        self.scheduler = Scheduler(self.__class__.__name__)
+        self.scheduler = HeapScheduler(self.__class__.__name__)
 
-        self.bot.loop.create_task(self.reschedule_reminders())
+        # Only reminders due before the end of the current window are kept in the scheduler.
+        self._window_end: t.Optional[datetime] = None
+        self._reschedule_task = self.bot.loop.create_task(self._reschedule_periodically())
 
     def cog_unload(self) -> None:
         """Cancel scheduled tasks."""
+        self._reschedule_task.cancel()
         self.scheduler.cancel_all()
 
+    async def _reschedule_periodically(self) -> None:
+        """Load the reminders due in the next window, twice per window."""
+        await self.bot.wait_until_database_ready()
+
+        # Ticking twice per window means every reminder is scheduled at least half a window ahead.
+        while True:
+            # A failed window is retried on the next tick rather than ending the loop.
+            try:
+                await self.reschedule_reminders()
+            except Exception:
+                log.exception("Failed to reschedule reminders for the next window.")
+            await asyncio.sleep(Scheduling.reschedule_window / 2)
+
     async def reschedule_reminders(self):
-        """Get all reminders from the database then reschedule them"""
+        """Get the reminders due within the next window from the database then reschedule them"""
         await self.bot.wait_until_database_ready()
-        reminders = await Reminder.query.gino.all()
 
-        now = datetime.utcnow()
+        # Move the window first so reminders created during the query are scheduled on creation.
+        window_end = datetime.utcnow() + timedelta(seconds=Scheduling.reschedule_window)
+        self._window_end = window_end
+
+        start = time.perf_counter()
+        reminders = [
+            reminder for reminder in
+            await Reminder.query.where(Reminder.expiration <= window_end).gino.all()
+            if reminder.id not in self.scheduler
+        ]
+
+        # Share lookups between reminders so each user and channel is fetched at most once.
+        lookups = {"users": {}, "channels": {}, "semaphore": asyncio.Semaphore(VALIDATION_CONCURRENCY)}
+        results = await asyncio.gather(
+            *(self.ensure_valid_reminder(reminder, lookups=lookups) for reminder in reminders),
+            return_exceptions=True
+        )
 
-        for reminder in reminders:
-            is_valid, *_ = await self.ensure_valid_reminder(reminder)
+        scheduled = 0
+
+        for reminder, result in zip(reminders, results):
+            if isinstance(result, Exception):
+                # It'll be retried on the next window.
+                log.error(f"Failed to validate reminder {reminder.id}.", exc_info=result)
+                continue
 
+            is_valid, *_ = result
             if not is_valid:
                 continue
 
-            #if the reminder is already overdue
-            if reminder.expiration < now:
-                await self.send_reminder(reminder)
+            # Overdue reminders are scheduled to be sent right away.
+            scheduled += 1
+            self.schedule_reminder(reminder)
 
-            else:
-                self.schedule_reminder(reminder)
+        log.info(
+            f"Rescheduled {scheduled} of {len(reminders)} reminders in {time.perf_counter() - start:.2f}s "
+            f"({len(lookups['users'])} users and {len(lookups['channels'])} channels fetched)."
+        )
 
     async def get_mentionables(self, reminder: Reminder):
         guild = await self.bot.fetch_guild(reminder.guild_id)
@@ -65,12 +108,70 @@ class Reminders(commands.Cog):
 
     def schedule_reminder(self, reminder: Reminder):
         """A coroutine which sends the reminder once the time is reached, and cancels the running task."""
+        if self._window_end is not None and reminder.expiration > self._window_end:
+            # It will be picked up by the window it falls in.
+            log.trace(f"Reminder #{reminder.id} is due after the current window, not scheduling yet.")
+            return
+
         self.scheduler.schedule_at(reminder.expiration, reminder.id, self.send_reminder(reminder))
 
-    async def ensure_valid_reminder(self, reminder: Reminder) -> t.Tuple[bool, discord.User, discord.TextChannel]:
-        """Ensure reminder author and channel can be fetched otherwise delete the reminder."""
-        user = await self.bot.fetch_user(reminder.author)
-        channel = await self.bot.fetch_channel(reminder.channel_id)
+    @staticmethod
+    async def _get_or_fetch(
+        id_: int,
+        get: t.Callable[[int], t.Any],
+        fetch: t.Callable[[int], t.Awaitable],
+        pending: t.Optional[t.Dict[int, asyncio.Future]] = None,
+        semaphore: t.Optional[asyncio.Semaphore] = None
+    ) -> t.Any:
+        """
+        Return the object with the given `id_` from the cache, falling back to fetching it.
+
+        Fetches in progress are stored in `pending`, when given, so that concurrent lookups for the
+        same ID share a single request. `semaphore` bounds the number of concurrent fetches.
+        Return None if the object doesn't exist or can't be accessed.
+        """
+        if (obj := get(id_)) is not None:
+            return obj
+
+        if pending is not None and id_ in pending:
+            return await pending[id_]
+
+        async def _fetch() -> t.Any:
+            async with semaphore or contextlib.nullcontext():
+                try:
+                    return await fetch(id_)
+                except (discord.NotFound, discord.Forbidden):
+                    return None
+
+        future = asyncio.ensure_future(_fetch())
+        if pending is not None:
+            pending[id_] = future
+        return await future
+
+    async def ensure_valid_reminder(
+        self,
+        reminder: Reminder,
+        *,
+        lookups: t.Optional[dict] = None
+    ) -> t.Tuple[bool, discord.User, discord.TextChannel]:
+        """
+        Ensure reminder author and channel can be fetched otherwise delete the reminder.
+
+        The gateway cache is consulted before making any requests. `lookups` can be given to share
+        fetched users and channels between calls, see `reschedule_reminders`.
+        """
+        lookups = lookups or {}
+        semaphore = lookups.get("semaphore")
+
+        user, channel = await asyncio.gather(
+            self._get_or_fetch(
+                int(reminder.author), self.bot.get_user, self.bot.fetch_user, lookups.get("users"), semaphore
+            ),
+            self._get_or_fetch(
+                int(reminder.channel_id), self.bot.get_channel, self.bot.fetch_channel,
+                lookups.get("channels"), semaphore
+            )
+        )
         is_valid = True
         if not user or not channel:
             is_valid = False
@@ -114,8 +215,9 @@ class Reminders(commands.Cog):
 
     async def _reschedule_reminder(self, reminder: Reminder) -> None:
         """Reschedule a reminder object."""
-        log.trace(f"Cancelling old task #{reminder.id}")
-        self.scheduler.cancel(reminder.id)
+        if reminder.id in self.scheduler:
+            log.trace(f"Cancelling old task #{reminder.id}")
+            self.scheduler.cancel(reminder.id)
 
         log.trace(f"Scheduling new task #{reminder.id}")
         self.schedule_reminder(reminder)
@@ -366,7 +468,8 @@ class Reminders(commands.Cog):
 
         reminder = await Reminder.get(id_)
         await reminder.delete()
-        self.scheduler.cancel(id_)
+        if id_ in self.scheduler:
+            self.scheduler.cancel(id_)
 
         await self._send_confirmation(
             ctx,
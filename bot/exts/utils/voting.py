@@ -1,91 +1,187 @@
-import asyncio
-from typing import Optional
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Optional
 
 import discord
 from discord.ext import commands
 
 from bot.bot import Bot
+from bot.constants import Voting as VotingConfig
+from bot.database.models import Poll
 from bot.utils.converters import DurationToSeconds
+from bot.utils.scheduling import HeapScheduler
+
+log = logging.getLogger(__name__)
 
 
 class Voting(commands.Cog):
     def __init__(self, bot: Bot) -> None:
         self.bot = bot
-        self.polls = {}
+
+        # Active polls and their in-memory tallies, keyed by poll message ID.
+        self.polls: Dict[int, Poll] = {}
+        self.options: Dict[int, Dict[str, str]] = {}
+        self.tallies: Dict[int, Counter] = {}
+
+        self.scheduler = HeapScheduler(self.__class__.__name__)
+        self.bot.loop.create_task(self.reschedule_polls())
+
+    def cog_unload(self) -> None:
+        """Cancel scheduled poll endings and tally updates."""
+        self.scheduler.cancel_all()
 
     @staticmethod
-    def get_most_voted_option(poll: dict) -> Optional[tuple[dict, str]]:
-        del poll["title"]
-        highest_vote = 0
-        most_voted_option = {}
-        most_voted_emoji = ""
-        idx = 0
-        for emoji, option in poll["options"].items():
-            if idx == 0:
-                highest_vote = option["count"]
-                idx += 1
+    def build_embed(title: str, options: Dict[str, str], tally: Counter) -> discord.Embed:
+        """Return the poll embed for the given options and vote counts."""
+        opts = [f"{emoji} - {option} {tally[emoji]}" for emoji, option in options.items()]
+        return discord.Embed(title=title, description="\n".join(opts))
+
+    @staticmethod
+    def get_most_voted_option(options: Dict[str, str], tally: Counter) -> Optional[str]:
+        """Return the emoji of the option with the most votes, or None if there's a tie."""
+        counts = [(tally[emoji], emoji) for emoji in options]
+        counts.sort(reverse=True)
+
+        if not counts or counts[0][0] == 0:
+            return None
+        if len(counts) > 1 and counts[0][0] == counts[1][0]:
+            return None
+        return counts[0][1]
+
+    async def reschedule_polls(self) -> None:
+        """Load active polls from the database, rebuild their tallies and schedule their endings."""
+        await self.bot.wait_until_database_ready()
+
+        for poll in await Poll.query.gino.all():
+            message_id = int(poll.id)
+            self._track(poll)
+
+            try:
+                message = await self._fetch_message(poll)
+            except (discord.NotFound, discord.Forbidden):
+                log.info(f"Poll {poll.id} message could not be fetched, ending it without a result.")
+                await self._forget(message_id)
                 continue
 
-            if option["count"] > highest_vote:
-                most_voted_emoji = emoji
-                most_voted_option = option
-                highest_vote = option["count"]
+            # Votes may have changed while we were offline.
+            self.tallies[message_id] = self._count_reactions(message)
+            self._schedule_update(message_id)
+            self.scheduler.schedule_at(poll.expiry, message_id, self.end_poll(message_id))
+
+    def _track(self, poll: Poll) -> None:
+        """Start keeping track of the votes on `poll`."""
+        message_id = int(poll.id)
+        self.polls[message_id] = poll
+        self.options[message_id] = json.loads(poll.options)
+        self.tallies[message_id] = Counter()
+
+    async def _forget(self, message_id: int) -> None:
+        """Stop tracking the poll with the given `message_id` and delete it from the database."""
+        poll = self.polls.pop(message_id)
+        self.options.pop(message_id)
+        self.tallies.pop(message_id)
+
+        if ("update", message_id) in self.scheduler:
+            self.scheduler.cancel(("update", message_id))
+
+        await poll.delete()
+
+    async def _get_channel(self, poll: Poll) -> discord.abc.Messageable:
+        channel_id = int(poll.channel_id)
+        return self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+
+    async def _fetch_message(self, poll: Poll) -> discord.Message:
+        channel = await self._get_channel(poll)
+        return await channel.fetch_message(int(poll.id))
+
+    def _count_reactions(self, message: discord.Message) -> Counter:
+        """Return the vote counts of the poll `message`, according to its reactions."""
+        options = self.options[message.id]
+        tally = Counter()
+
+        for reaction in message.reactions:
+            if reaction.emoji in options:
+                # Don't count the reaction the bot added itself.
+                tally[reaction.emoji] = reaction.count - (1 if reaction.me else 0)
+
+        return tally
+
+    def _schedule_update(self, message_id: int) -> None:
+        """Schedule an edit of the poll's tally, unless one is already pending."""
+        task_id = ("update", message_id)
+        if task_id not in self.scheduler:
+            self.scheduler.schedule_later(VotingConfig.update_interval, task_id, self.update_tally(message_id))
+
+    async def update_tally(self, message_id: int) -> None:
+        """Edit the poll message to show its current in-memory tally."""
+        poll = self.polls.get(message_id)
+        if poll is None:
+            return
 
-            idx += 1
-        if highest_vote != 0:
-            return most_voted_option, most_voted_emoji
+        embed = self.build_embed(poll.title, self.options[message_id], self.tallies[message_id])
+        try:
+            channel = await self._get_channel(poll)
+            await channel.get_partial_message(message_id).edit(embed=embed)
+        except discord.HTTPException:
+            log.exception(f"Failed to update the tally of poll {message_id}.")
 
-    @commands.Cog.listener()
-    async def on_reaction_add(self, reaction: discord.Reaction, user: discord.User):
-        if reaction.message.id not in self.polls.keys():
+    async def _on_vote(self, payload: discord.RawReactionActionEvent, change: int) -> None:
+        if payload.message_id not in self.polls:
             return
 
-        if user.bot:
+        if payload.user_id == self.bot.user.id:
             return
 
-        poll = self.polls.get(reaction.message.id)
-
-        if not poll["active"]:
+        emoji = str(payload.emoji)
+        if emoji not in self.options[payload.message_id]:
             return
 
-        options = poll["options"][reaction.emoji]["options"]
-        title = poll["title"]
-        if reaction.emoji in poll["options"].keys():
-            poll["options"][reaction.emoji]["count"] += 1
-            self.polls[reaction.message.id] = poll
+        # Only count here and let the debounced update edit the message.
+        self.tallies[payload.message_id][emoji] += change
+        self._schedule_update(payload.message_id)
 
-            opts = [
-                f"{option} {poll_item['count']}"
-                for poll_item, option in zip(poll["options"].values(), options.values())
-            ]
-            embed = discord.Embed(title=title, description="\n".join(opts))
-            await reaction.message.edit(embed=embed)
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        await self._on_vote(payload, 1)
 
     @commands.Cog.listener()
-    async def on_reaction_remove(self, reaction: discord.Reaction, user: discord.User):
-        if reaction.message.id not in self.polls.keys():
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        await self._on_vote(payload, -1)
+
+    async def end_poll(self, message_id: int) -> None:
+        """Announce the winner of the poll with the given `message_id` and stop tracking it."""
+        poll = self.polls[message_id]
+        options = self.options[message_id]
+
+        try:
+            message = await self._fetch_message(poll)
+        except (discord.NotFound, discord.Forbidden):
+            log.info(f"Poll {message_id} message was deleted before the poll ended.")
+            await self._forget(message_id)
             return
-
-        if user.bot:
+        except discord.HTTPException:
+            # The poll is ended all the same, otherwise it would never be forgotten.
+            log.exception(f"Failed to fetch poll {message_id} message, ending it without a result.")
+            await self._forget(message_id)
             return
 
-        poll = self.polls.get(reaction.message.id)
-
-        if not poll["active"]:
-            return
+        # The reactions on the message are authoritative, the in-memory tally may have drifted.
+        tally = self._count_reactions(message)
+        await self._forget(message_id)
 
-        options = poll["options"][reaction.emoji]["options"]
-        title = poll["title"]
-        if reaction.emoji in poll["options"].keys():
-            poll["options"][reaction.emoji]["count"] -= 1
-            self.polls[reaction.message.id] = poll
+        try:
+            await message.edit(embed=self.build_embed(poll.title, options, tally))
 
-            opts = [
-                f"{option} {poll_item['count']}"
-                for poll_item, option in zip(poll["options"].values(), options.values())
-            ]
-            embed = discord.Embed(title=title, description="\n".join(opts))
-            await reaction.message.edit(embed=embed)
+            won = self.get_most_voted_option(options, tally)
+            if won:
+                await message.channel.send(f":sparkles: {won} {options[won]} :sparkles: won!1!!1!")
+            else:
+                await message.channel.send("bruh, its a tie")
+            await message.clear_reactions()
+        except discord.HTTPException:
+            log.exception(f"Failed to announce the result of poll {message_id}.")
 
     @commands.command(aliases=("poll", "choose"))
     async def vote(
@@ -95,7 +191,6 @@ class Voting(commands.Cog):
         expiry: DurationToSeconds,
         *options: str,
     ):
-        poll = {"title": title, "options": {}}
         if len(options) > 20:
             raise commands.BadArgument(
                 "the limit is 20 options, not your imagination, unfortunately"
@@ -104,36 +199,32 @@ class Voting(commands.Cog):
             raise commands.BadArgument("that's too long")
 
         codepoint_start = 127462  # represents "regional_indicator_a" unicode value
-        options = {
-            chr(i): f"{chr(i)} - {v}"
-            for i, v in enumerate(options, start=codepoint_start)
-        }
-        for emoji, option in options.items():
-            opt = {"content": option[4:], "options": options, "count": 0}
-            poll["options"][emoji] = opt
-
-        opts = [
-            f"{option} {poll_item['count']}"
-            for poll_item, option in zip(poll["options"].values(), options.values())
-        ]
-        embed = discord.Embed(title=title, description="\n".join(opts))
-        message = await ctx.send(embed=embed)
+        options = {chr(i): v for i, v in enumerate(options, start=codepoint_start)}
+
+        message = await ctx.send(embed=self.build_embed(title, options, Counter()))
         for reaction in options:
             await message.add_reaction(reaction)
-        poll["active"] = True
-        self.polls[message.id] = poll
-
-        await asyncio.sleep(expiry)
-        poll["active"] = False
-        del self.polls[message.id]
 
-        won = self.get_most_voted_option(poll)
-        if won:
-            await ctx.send(f":sparkles: {won[1]} {won[0]['content']} :sparkles: won!1!!1!")
-
-        else:
-            await ctx.send("bruh, its a tie")
-        await message.clear_reactions()
+        poll = await Poll.create(
+            id=str(message.id),
+            channel_id=str(ctx.channel.id),
+            guild_id=str(ctx.guild.id) if ctx.guild else None,
+            title=title,
+            options=json.dumps(options),
+            expiry=datetime.utcnow() + timedelta(seconds=expiry),
+        )
+        self._track(poll)
+        self.scheduler.schedule_at(poll.expiry, message.id, self.end_poll(message.id))
+
+        # Votes made before the poll was tracked weren't counted, so count the reactions once.
+        try:
+            message = await ctx.channel.fetch_message(message.id)
+        except discord.HTTPException:
+            log.warning(f"Failed to recount poll {message.id}, votes made while it was created are missing.")
+            return
+        if message.id in self.polls:
+            self.tallies[message.id] = self._count_reactions(message)
+            self._schedule_update(message.id)
 
 
 def setup(bot: Bot):
@@ -1,6 +1,12 @@
+import atexit
+import copy
+import json
 import logging
 import os
+import queue
+import random
 import sys
+from datetime import datetime, timezone
 from logging import Logger, handlers
 from pathlib import Path
 
@@ -20,9 +26,9 @@ def setup() -> None:
     Logger.trace = _monkeypatch_trace
 
     format_string = "%(asctime)s | %(name)s | %(levelname)s | %(message)s"
-    log_format = logging.Formatter(format_string)
+    log_format = JSONFormatter() if constants.Logging.json else logging.Formatter(format_string)
 
-    log_file = Path("logs", "bot.log")
+    log_file = Path("logs", "bot.jsonl" if constants.Logging.json else "bot.log")
     log_file.parent.mkdir(exist_ok=True)
     file_handler = handlers.RotatingFileHandler(log_file, maxBytes=5242880, backupCount=7, encoding="utf8")
     file_handler.setFormatter(log_format)
@@ -43,6 +49,20 @@ def setup() -> None:
 
     coloredlogs.install(level=logging.TRACE, logger=root_log)
 
+    # Hand the file and stream handlers over to a listener thread, so that a log call on the
+    # event loop only has to put the record on a queue and never waits on I/O.
+    output_handlers = root_log.handlers[:]
+    root_log.handlers.clear()
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+    root_log.addHandler(queue_handler)
+
+    listener = handlers.QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
     root_log.setLevel(logging.DEBUG if constants.DEBUG_MODE else logging.INFO)
     logging.getLogger("discord").setLevel(logging.WARNING)
     logging.getLogger("websockets").setLevel(logging.WARNING)
@@ -60,7 +80,7 @@ def setup() -> None:
 def setup_sentry() -> None:
     """Set up the Sentry logging integrations."""
     sentry_logging = LoggingIntegration(
-        level=logging.DEBUG,
+        level=logging.INFO,
         event_level=logging.WARNING
     )
 
@@ -72,6 +92,92 @@ def setup_sentry() -> None:
     )
 
 
+class JSONFormatter(logging.Formatter):
+    """Format records as single line JSON objects, for log ingestion."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        return json.dumps(entry)
+
+
+class _QueueHandler(handlers.QueueHandler):
+    """
+    A `QueueHandler` which keeps tracebacks apart from the message.
+
+    The stock `prepare` formats the record, merging its traceback into the message, so the output
+    handlers' formatters couldn't tell them apart. This only merges the arguments into the message
+    and formats the traceback into `exc_text`, which formatters append or, like `JSONFormatter`,
+    keep in a field of their own.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            # Don't keep the traceback's frames alive while the record waits in the queue.
+            record.exc_info = None
+
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Only let through a fraction of the TRACE and DEBUG records of noisy loggers.
+
+    The fraction is looked up in `constants.Logging.sample_rates` by logger name, where a rate
+    set for a logger also applies to its children. Records at INFO and above are always kept.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._rates = None
+        self._resolved = {}
+
+    def _rate(self, name: str) -> float:
+        # Start over when the configuration is reloaded with new rates.
+        if self._rates is not constants.Logging.sample_rates:
+            self._rates = constants.Logging.sample_rates
+            self._resolved = {}
+
+        try:
+            return self._resolved[name]
+        except KeyError:
+            pass
+
+        rate = 1.0
+        parts = name.split(".")
+        for end in range(len(parts), 0, -1):
+            prefix = ".".join(parts[:end])
+            if self._rates and prefix in self._rates:
+                rate = float(self._rates[prefix])
+                break
+
+        self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+
+        rate = self._rate(record.name)
+        return rate >= 1 or random.random() < rate
+
+
 def _monkeypatch_trace(self: logging.Logger, msg: str, *args, **kwargs) -> None:
     """
     Log 'msg % args' with severity 'TRACE'.
@@ -1,7 +1,7 @@
 from discord.ext import commands
 
 from bot import constants
-from bot.database.models import Guild
+from bot.utils.guild_settings import guild_settings
 
 
 class BotPrefixHandler:
@@ -16,7 +16,8 @@ class BotPrefixHandler:
         prefix = None
         if not bot.static_prefix:
             if message.guild:
-                guild = await Guild.get(str(message.guild.id))
+                # Served from memory; the cache is warmed once the database connects.
+                guild = guild_settings.get(message.guild.id)
                 prefix = guild.prefix if guild else None
 
             return (
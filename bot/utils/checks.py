@@ -0,0 +1,17 @@
+from discord.ext import commands
+
+from bot.constants import Roles
+
+
+def has_moderation_role():
+    """
+    Check that the invoker has any of the configured moderation roles.
+
+    Unlike `commands.has_any_role(*Roles.moderation_roles)`, the roles are read on every
+    invocation rather than when the command is defined, so reloading the configuration
+    takes effect immediately.
+    """
+    async def predicate(ctx: commands.Context) -> bool:
+        return await commands.has_any_role(*Roles.moderation_roles).predicate(ctx)
+
+    return commands.check(predicate)
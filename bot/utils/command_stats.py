@@ -0,0 +1,106 @@
+import contextvars
+import json
+import logging
+import time
+import typing as t
+from collections import deque
+
+from bot.utils import metrics
+
+log = logging.getLogger(__name__)
+
+# Number of most recent invocations per command used to compute percentiles.
+SAMPLE_SIZE = 1000
+
+
+class CommandTiming:
+    """Time spent on a single command invocation, split into database and Discord HTTP time."""
+
+    __slots__ = ("command", "start", "wall_time", "db_time", "db_queries", "http_time", "http_requests", "finished")
+
+    def __init__(self, command: str) -> None:
+        self.command = command
+        self.start = time.perf_counter()
+        self.wall_time = 0.0
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.http_time = 0.0
+        self.http_requests = 0
+        self.finished = False
+
+    def finish(self) -> None:
+        self.wall_time = time.perf_counter() - self.start
+        # Tasks and callbacks started by the command inherit its context, but what they do afterwards isn't its time.
+        self.finished = True
+
+
+# The timing of the command being invoked in the current context, if any.
+current_timing: contextvars.ContextVar[t.Optional[CommandTiming]] = contextvars.ContextVar(
+    "current_timing", default=None
+)
+
+
+def add_db_time(elapsed: float) -> None:
+    """Attribute `elapsed` seconds of database time to the command being invoked, if any."""
+    if (timing := current_timing.get()) is not None and not timing.finished:
+        timing.db_time += elapsed
+        timing.db_queries += 1
+
+
+def add_http_time(elapsed: float) -> None:
+    """Attribute `elapsed` seconds of Discord HTTP time to the command being invoked, if any."""
+    if (timing := current_timing.get()) is not None and not timing.finished:
+        timing.http_time += elapsed
+        timing.http_requests += 1
+
+
+def _percentile(sorted_samples: t.Sequence[float], percentile: float) -> float:
+    index = min(len(sorted_samples) - 1, int(round(percentile / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+class CommandStats:
+    """Rolling wall time samples per command, and logging of slow invocations."""
+
+    def __init__(self, slow_threshold: float) -> None:
+        self.slow_threshold = slow_threshold
+        self._samples: t.Dict[str, t.Deque[CommandTiming]] = {}
+
+    def record(self, timing: CommandTiming, **context) -> None:
+        """
+        Store the finished `timing` and log a trace if it exceeded the slow threshold.
+
+        `context` is added to the trace, e.g. the guild and channel the command was invoked in.
+        """
+        self._samples.setdefault(timing.command, deque(maxlen=SAMPLE_SIZE)).append(timing)
+        metrics.command_seconds.observe(timing.wall_time, command=timing.command)
+
+        if timing.wall_time >= self.slow_threshold:
+            trace = {
+                "command": timing.command,
+                "wall_ms": round(timing.wall_time * 1000, 1),
+                "db_ms": round(timing.db_time * 1000, 1),
+                "db_queries": timing.db_queries,
+                "http_ms": round(timing.http_time * 1000, 1),
+                "http_requests": timing.http_requests,
+                **context,
+            }
+            log.warning(f"Slow command: {json.dumps(trace)}")
+
+    def summary(self) -> t.List[t.Dict[str, t.Union[str, int, float]]]:
+        """Return the invocation count, wall time percentiles and mean DB/HTTP time of each command."""
+        rows = []
+
+        for command, timings in self._samples.items():
+            wall_times = sorted(timing.wall_time for timing in timings)
+            rows.append({
+                "command": command,
+                "count": len(timings),
+                "p50": _percentile(wall_times, 50),
+                "p95": _percentile(wall_times, 95),
+                "p99": _percentile(wall_times, 99),
+                "db": sum(timing.db_time for timing in timings) / len(timings),
+                "http": sum(timing.http_time for timing in timings) / len(timings),
+            })
+
+        return rows
@@ -15,7 +15,8 @@ from discord.ext.commands import (
 
 from bot import exts
 from bot.utils.time import parse_duration_string
-from bot.utils.extensions import EXTENSIONS, unqualify
+from bot.utils.extensions import get_extension_names, unqualify
+from bot.utils.regex import CaseInsensitivePattern, UnsafePatternError, compile_safe
 from bot.database.models import Infraction
 
 logger = logging.getLogger(__name__)
@@ -183,6 +184,16 @@ class ISODateTime(Converter):
         return dt
 
 
+class Regex(Converter):
+    """Compile a case-insensitive regular expression, refusing patterns which could make matching hang."""
+
+    async def convert(self, ctx: Context, argument: str) -> CaseInsensitivePattern:
+        try:
+            return compile_safe(argument)
+        except UnsafePatternError as e:
+            raise BadArgument(str(e))
+
+
 class Extension(Converter):
     """
     Fully qualify the name of an extension and ensure it exists.
@@ -197,13 +208,14 @@ class Extension(Converter):
 
         argument = argument.lower()
 
-        if argument in EXTENSIONS:
+        extensions = get_extension_names()
+        if argument in extensions:
             return argument
-        elif (qualified_arg := f"{exts.__name__}.{argument}") in EXTENSIONS:
+        elif (qualified_arg := f"{exts.__name__}.{argument}") in extensions:
             return qualified_arg
 
         matches = []
-        for ext in EXTENSIONS:
+        for ext in extensions:
             if argument == unqualify(ext):
                 matches.append(ext)
 
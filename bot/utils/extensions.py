@@ -1,7 +1,7 @@
 import importlib
 import inspect
 import pkgutil
-from typing import Iterator, NoReturn
+from typing import FrozenSet, Iterator, NoReturn, Optional, Tuple
 
 from discord.ext.commands import Context
 
@@ -35,4 +35,34 @@ def walk_extensions() -> Iterator[str]:
         yield module.name
 
 
-EXTENSIONS = frozenset(walk_extensions())
+_extensions: Optional[Tuple[str, ...]] = None
+_extension_names: Optional[FrozenSet[str]] = None
+
+
+def get_extensions() -> Tuple[str, ...]:
+    """
+    Return the names of all extensions in the order they're found in, walking the bot.exts subpackage the first time.
+
+    Extensions are loaded in this order, so it's the same on every run.
+    """
+    global _extensions
+
+    if _extensions is None:
+        _extensions = tuple(walk_extensions())
+    return _extensions
+
+
+def get_extension_names() -> FrozenSet[str]:
+    """Return the names of all extensions as a set, for membership checks."""
+    global _extension_names
+
+    if _extension_names is None:
+        _extension_names = frozenset(get_extensions())
+    return _extension_names
+
+
+def __getattr__(name: str):
+    # `EXTENSIONS` is only computed once something asks for it, rather than whenever this module is imported.
+    if name == "EXTENSIONS":
+        return get_extension_names()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,122 @@
+import logging
+import typing as t
+
+from bot.database.models import Guild
+
+log = logging.getLogger(__name__)
+
+
+class GuildSettingsCache:
+    """
+    Process-wide, in-memory mirror of the `guilds` table.
+
+    The cache is warmed once with every row after the database connects, and is kept up to date
+    by whoever writes a `Guild` row (through `set`, `update` or `create`). Lookups through `get`
+    never touch the database, so they are safe to use on hot paths such as prefix resolution.
+    `hits` and `misses` count `get` calls which did and didn't find a row.
+
+    Resolved server log channel IDs are kept in a separate keyed cache which is invalidated
+    whenever the guild's row is replaced or removed.
+    """
+
+    def __init__(self) -> None:
+        self._guilds: t.Dict[int, Guild] = {}
+        self._log_channels: t.Dict[int, t.Optional[int]] = {}
+        self.ready = False
+
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, guild_id: int) -> bool:
+        """Return True if settings for the guild with the given `guild_id` are cached."""
+        return int(guild_id) in self._guilds
+
+    def __len__(self) -> int:
+        return len(self._guilds)
+
+    async def warm(self) -> None:
+        """Load every guild row from the database into the cache."""
+        guilds = await Guild.query.gino.all()
+        self._guilds = {int(guild.id): guild for guild in guilds}
+        self._log_channels.clear()
+        self.ready = True
+
+        log.info(f"Guild settings cache warmed with {len(self._guilds)} guilds.")
+
+    def get(self, guild_id: int) -> t.Optional[Guild]:
+        """Return the cached settings for the guild with the given `guild_id`, or None."""
+        guild = self._guilds.get(int(guild_id))
+
+        if guild is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return guild
+
+    async def fetch(self, guild_id: int) -> t.Optional[Guild]:
+        """
+        Return the settings for the guild with the given `guild_id`.
+
+        Unlike `get`, this falls back to the database when the cache hasn't been warmed yet.
+        """
+        if self.ready:
+            return self.get(guild_id)
+
+        guild = self._guilds.get(int(guild_id))
+        if guild is None:
+            guild = await Guild.get(str(guild_id))
+            if guild is not None:
+                self.set(guild)
+
+        return guild
+
+    async def get_log_channel_id(self, guild_id: int) -> t.Optional[int]:
+        """Return the ID of the server log channel of the guild with the given `guild_id`, if it has one."""
+        guild_id = int(guild_id)
+
+        try:
+            return self._log_channels[guild_id]
+        except KeyError:
+            pass
+
+        guild = await self.fetch(guild_id)
+        if guild is None:
+            # Don't remember unknown guilds, their row may be created later on.
+            return None
+
+        channel_id = int(guild.server_log_channel) if guild.server_log_channel else None
+        self._log_channels[guild_id] = channel_id
+        return channel_id
+
+    def set(self, guild: Guild) -> None:
+        """Store the given `guild` row in the cache, replacing any previous entry."""
+        guild_id = int(guild.id)
+        self._guilds[guild_id] = guild
+        self._log_channels.pop(guild_id, None)
+
+    def invalidate(self, guild_id: int) -> None:
+        """Remove the guild with the given `guild_id` from the cache."""
+        guild_id = int(guild_id)
+        self._guilds.pop(guild_id, None)
+        self._log_channels.pop(guild_id, None)
+
+    async def create(self, **values) -> Guild:
+        """Create a new guild row and cache it."""
+        guild = await Guild.create(**values)
+        self.set(guild)
+        return guild
+
+    async def update(self, guild_id: int, **values) -> t.Optional[Guild]:
+        """Update the guild row with the given `guild_id` and refresh its cached copy."""
+        guild = self._guilds.get(int(guild_id)) or await Guild.get(str(guild_id))
+        if guild is None:
+            log.warning(f"Tried to update settings of unknown guild {guild_id}.")
+            return None
+
+        await guild.update(**values).apply()
+        self.set(guild)
+        return guild
+
+
+guild_settings = GuildSettingsCache()
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+import typing as t
+from collections import deque
+
+import discord
+
+from bot.utils import scheduling
+
+log = logging.getLogger(__name__)
+
+# Limits Discord puts on a single message.
+MAX_EMBEDS = 10
+MAX_EMBED_CHARACTERS = 6000
+MAX_FILES = 10
+
+
+class _LogEntry:
+    """A single queued log embed, along with the message content and files which should accompany it."""
+
+    __slots__ = ("embed", "content", "files", "queued_at")
+
+    def __init__(
+        self,
+        embed: discord.Embed,
+        content: t.Optional[str] = None,
+        files: t.Optional[t.List[discord.File]] = None,
+    ) -> None:
+        self.embed = embed
+        self.content = content
+        self.files = files or []
+        self.queued_at = time.monotonic()
+
+
+class LogQueue:
+    """
+    Batch log embeds per channel and deliver them in as few messages as possible.
+
+    Each channel gets its own queue and worker task. A worker flushes its queue once the oldest
+    entry has waited `flush_interval` seconds, or as soon as a full message worth of embeds is
+    waiting. Up to 10 embeds are coalesced into one message, within Discord's 6000 character
+    embed budget, and at most one entry carrying content or files goes into each message.
+
+    Since a worker only ever has a single request in flight, each channel's message route is
+    never hit concurrently and discord.py's per-route bucket handling can pace us. Embeds which
+    queue up while a worker waits on a rate limit are simply sent in larger batches afterwards.
+
+    The queue exposes a few counters: `depth` is the number of embeds waiting, `flushes` the
+    number of messages sent, `embeds_sent` the number of embeds delivered, and
+    `last_flush_latency`/`max_flush_latency` the time in seconds between an embed being queued
+    and the message containing it being sent.
+    """
+
+    def __init__(self, bot: discord.Client, *, flush_interval: float = 2.0) -> None:
+        self.bot = bot
+        self.flush_interval = flush_interval
+
+        self._queues: t.Dict[int, t.Deque[_LogEntry]] = {}
+        self._wakeups: t.Dict[int, asyncio.Event] = {}
+        self._workers: t.Dict[int, asyncio.Task] = {}
+
+        self.flushes = 0
+        self.embeds_sent = 0
+        self.failed_flushes = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Return the total number of embeds waiting to be sent."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def channel_depth(self, channel_id: int) -> int:
+        """Return the number of embeds waiting to be sent to the channel with the given `channel_id`."""
+        return len(self._queues.get(channel_id, ()))
+
+    @property
+    def average_flush_latency(self) -> float:
+        """Return the average time in seconds between an embed being queued and sent."""
+        return self.total_flush_latency / self.flushes if self.flushes else 0.0
+
+    def put(
+        self,
+        channel_id: int,
+        embeds: t.Sequence[discord.Embed],
+        *,
+        content: t.Optional[str] = None,
+        files: t.Optional[t.List[discord.File]] = None,
+    ) -> None:
+        """Queue `embeds` for delivery to the channel with the given `channel_id`."""
+        queue = self._queues.setdefault(channel_id, deque())
+
+        for index, embed in enumerate(embeds):
+            # Content and files accompany the first embed of the log.
+            if index == 0:
+                queue.append(_LogEntry(embed, content, files))
+            else:
+                queue.append(_LogEntry(embed))
+
+        wakeup = self._wakeups.setdefault(channel_id, asyncio.Event())
+        if len(queue) >= MAX_EMBEDS:
+            wakeup.set()
+
+        if channel_id not in self._workers:
+            self._workers[channel_id] = scheduling.create_task(
+                self._worker(channel_id),
+                name=f"log_queue_{channel_id}",
+            )
+
+    async def close(self) -> None:
+        """Flush every queue immediately and wait for all workers to finish."""
+        for wakeup in self._wakeups.values():
+            wakeup.set()
+        self.flush_interval = 0
+
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+    async def _worker(self, channel_id: int) -> None:
+        """Deliver queued embeds for a channel until its queue is empty."""
+        queue = self._queues[channel_id]
+        wakeup = self._wakeups[channel_id]
+
+        try:
+            while queue:
+                if len(queue) < MAX_EMBEDS:
+                    # Give more logs a chance to arrive before sending a partial batch.
+                    wait = queue[0].queued_at + self.flush_interval - time.monotonic()
+                    if wait > 0:
+                        try:
+                            await asyncio.wait_for(wakeup.wait(), timeout=wait)
+                        except asyncio.TimeoutError:
+                            pass
+                wakeup.clear()
+
+                await self._flush(channel_id, self._take_batch(queue))
+        finally:
+            del self._workers[channel_id]
+            if not queue:
+                del self._queues[channel_id]
+                del self._wakeups[channel_id]
+
+    @staticmethod
+    def _take_batch(queue: t.Deque[_LogEntry]) -> t.List[_LogEntry]:
+        """Pop as many entries off the front of `queue` as fit into a single message."""
+        batch = [queue.popleft()]
+        characters = len(batch[0].embed)
+        has_attachments = bool(batch[0].content or batch[0].files)
+
+        while queue and len(batch) < MAX_EMBEDS:
+            entry = queue[0]
+            entry_has_attachments = bool(entry.content or entry.files)
+
+            if characters + len(entry.embed) > MAX_EMBED_CHARACTERS:
+                break
+            if entry_has_attachments and has_attachments:
+                break
+
+            batch.append(queue.popleft())
+            characters += len(entry.embed)
+            has_attachments = has_attachments or entry_has_attachments
+
+        return batch
+
+    async def _flush(self, channel_id: int, batch: t.List[_LogEntry]) -> None:
+        """Send the entries in `batch` to the channel with the given `channel_id` as one message."""
+        content = next((entry.content for entry in batch if entry.content), None)
+        files = [file for entry in batch for file in entry.files][:MAX_FILES]
+
+        channel = self.bot.get_channel(channel_id)
+        try:
+            if channel is None:
+                channel = await self.bot.fetch_channel(channel_id)
+
+            await channel.send(content=content, embeds=[entry.embed for entry in batch], files=files or None)
+        except discord.HTTPException:
+            self.failed_flushes += 1
+            log.exception(f"Failed to deliver {len(batch)} log embeds to channel {channel_id}.")
+            return
+
+        latency = time.monotonic() - batch[0].queued_at
+        self.flushes += 1
+        self.embeds_sent += len(batch)
+        self.last_flush_latency = latency
+        self.max_flush_latency = max(self.max_flush_latency, latency)
+        self.total_flush_latency += latency
+
+        log.trace(f"Delivered {len(batch)} log embeds to channel {channel_id} after {latency:.3f}s.")
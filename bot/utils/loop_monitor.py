@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import typing as t
+
+from bot.utils import metrics, scheduling
+
+log = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """
+    Measure how late the event loop runs scheduled work, and find out what is blocking it.
+
+    A sampler task sleeps for `interval` seconds at a time; the time it oversleeps by is the loop
+    lag, which is kept in `lag` and observed by the `loop_lag_seconds` histogram.
+
+    Since the sampler can't run while the loop is blocked, a watchdog thread checks when the
+    sampler last ran. Once that is more than `threshold` seconds overdue, the watchdog grabs the
+    current stack of the loop's thread, which is the code hogging the loop, and logs it right
+    away. The sampler logs how long the stall lasted once the loop runs again.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, *, interval: float = 0.25, threshold: float = 0.5) -> None:
+        self.loop = loop
+        self.interval = interval
+        self.threshold = threshold
+
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: t.Optional[int] = None
+        self._stalled = False
+        self._stopped = threading.Event()
+        self._sampler: t.Optional[asyncio.Task] = None
+        self._watchdog: t.Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the sampler task; it starts the watchdog thread once it's running on the loop."""
+        if self._sampler is None:
+            self._sampler = scheduling.create_task(self._sample(), name="loop_monitor", event_loop=self.loop)
+
+    def stop(self) -> None:
+        """Stop sampling and watching the loop."""
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.cancel()
+            self._sampler = None
+
+    async def _sample(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+        while not self._stopped.is_set():
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+
+            self._heartbeat = now
+            self.lag = max(0.0, now - start - self.interval)
+            self.max_lag = max(self.max_lag, self.lag)
+            metrics.loop_lag_seconds.observe(self.lag)
+
+            if self._stalled:
+                self._stalled = False
+                log.warning(f"Event loop recovered after being blocked for {self.lag:.3f}s.")
+
+    def _watch(self) -> None:
+        """Log the stack of the loop thread whenever the sampler is overdue by more than the threshold."""
+        while not self._stopped.wait(self.interval):
+            overdue = time.monotonic() - self._heartbeat - self.interval
+            if overdue < self.threshold or self._stalled:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+
+            # Only report each stall once, the sampler resets this when the loop runs again.
+            self._stalled = True
+            self.stalls += 1
+            stack = "".join(traceback.format_stack(frame))
+            log.warning(f"Event loop has been blocked for over {overdue:.3f}s, currently running:\n{stack}")
@@ -0,0 +1,65 @@
+import json
+import typing as t
+import zlib
+
+import discord
+
+# Size of the chunks compressed data is decompressed in.
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def serialize_message(message: discord.Message) -> dict:
+    """Return the parts of `message` kept in message logs, as a JSON serializable dict."""
+    return {
+        "id": message.id,
+        "author": message.author.id,
+        "author_name": str(message.author),
+        "channel_id": message.channel.id,
+        "created_at": message.created_at.isoformat(),
+        "content": message.content.replace("\0", ""),
+        "embeds": [embed.to_dict() for embed in message.embeds],
+        "attachments": [attachment.url for attachment in message.attachments],
+    }
+
+
+def compress_messages(messages: t.Iterable[discord.Message]) -> bytes:
+    """Serialize `messages` as newline delimited JSON, compressed with zlib as it's written."""
+    compressor = zlib.compressobj(level=6)
+    chunks = []
+
+    for message in messages:
+        line = json.dumps(serialize_message(message), separators=(",", ":")) + "\n"
+        chunks.append(compressor.compress(line.encode("utf8")))
+    chunks.append(compressor.flush())
+
+    return b"".join(chunks)
+
+
+def decompress_messages(data: bytes) -> t.Iterator[dict]:
+    """Yield the messages stored by `compress_messages`, decompressing them a chunk at a time."""
+    decompressor = zlib.decompressobj()
+    pending = b""
+
+    for start in range(0, len(data), READ_CHUNK_SIZE):
+        pending += decompressor.decompress(data[start:start + READ_CHUNK_SIZE])
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield json.loads(line)
+
+    pending += decompressor.flush()
+    if pending.strip():
+        yield json.loads(pending)
+
+
+def format_transcript(messages: t.Iterable[dict]) -> str:
+    """Return a plain text transcript of logged `messages`."""
+    lines = []
+
+    for message in messages:
+        lines.append(f"{message['author_name']} ({message['author']}) {message['created_at']} -> {message['content']}")
+        for attachment in message["attachments"]:
+            lines.append(f"    [attachment] {attachment}")
+        for embed in message["embeds"]:
+            lines.append(f"    [embed] {json.dumps(embed)}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import typing as t
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import discord
+from sqlalchemy.dialects.postgresql import insert
+
+from bot.constants import MessageStore as MessageStoreConfig
+from bot.database.database import db
+from bot.database.models import StoredMessage
+from bot.utils import scheduling
+
+log = logging.getLogger(__name__)
+
+
+class MessageRecord:
+    """The parts of a message needed to log its deletion or edit."""
+
+    __slots__ = ("id", "guild_id", "channel_id", "author_id", "author_name", "content", "attachments", "created_at")
+
+    def __init__(
+        self,
+        id: int,
+        guild_id: int,
+        channel_id: int,
+        author_id: int,
+        author_name: str,
+        content: str,
+        attachments: t.Tuple[str, ...],
+        created_at: datetime,
+    ) -> None:
+        self.id = id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.author_name = author_name
+        self.content = content
+        self.attachments = attachments
+        self.created_at = created_at
+
+    @classmethod
+    def from_message(cls, message: discord.Message) -> "MessageRecord":
+        return cls(
+            message.id,
+            message.guild.id,
+            message.channel.id,
+            message.author.id,
+            str(message.author),
+            message.content,
+            tuple(attachment.url for attachment in message.attachments),
+            message.created_at.replace(tzinfo=None),
+        )
+
+    @classmethod
+    def from_row(cls, row: StoredMessage) -> "MessageRecord":
+        return cls(
+            int(row.id),
+            int(row.guild_id),
+            int(row.channel_id),
+            int(row.author_id),
+            row.author_name,
+            row.content,
+            tuple(row.attachments.split("\n")) if row.attachments else (),
+            row.created_at,
+        )
+
+    def to_row(self) -> dict:
+        return {
+            "id": str(self.id),
+            "guild_id": str(self.guild_id),
+            "channel_id": str(self.channel_id),
+            "author_id": str(self.author_id),
+            "author_name": self.author_name,
+            "content": self.content.replace("\0", ""),
+            "attachments": "\n".join(self.attachments),
+            "created_at": self.created_at,
+        }
+
+
+class MessageStore:
+    """
+    A bounded store of recent messages, kept per guild so a busy guild can't push out the messages of quiet ones.
+
+    Each guild keeps up to `max_messages_per_guild` records, evicting the least recently stored or
+    edited one once full. With `spill` enabled, evicted records are written to the
+    `stored_messages` table every `flush_interval` seconds instead of being forgotten, and rows
+    older than `retention` seconds are pruned, so deletes and edits of older messages can still be
+    logged. These settings are read from the `bot.message_store` configuration whenever they're
+    used, so reloading it applies them.
+    """
+
+    def __init__(self) -> None:
+        self._guilds: t.Dict[int, OrderedDict[int, MessageRecord]] = {}
+        # Evicted records waiting to be written to the database, by message ID.
+        self._spilled: t.Dict[int, MessageRecord] = {}
+        # Records being written by the current flush. They're looked up here until the write commits.
+        self._flushing: t.Dict[int, MessageRecord] = {}
+        self._flusher: t.Optional[asyncio.Task] = None
+
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return sum(len(messages) for messages in self._guilds.values())
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start writing evicted records to the database on `loop`."""
+        if self._flusher is None:
+            self._flusher = scheduling.create_task(
+                self._flush_periodically(), name="message_store_flusher", event_loop=loop
+            )
+
+    async def close(self) -> None:
+        """Stop the periodic flush and write out any pending records."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+    def add(self, message: discord.Message) -> None:
+        """Store `message`, evicting the guild's least recently used record if it's full."""
+        record = MessageRecord.from_message(message)
+        messages = self._guilds.setdefault(record.guild_id, OrderedDict())
+        messages[record.id] = record
+        self._evict(messages)
+
+    def _evict(self, messages: OrderedDict) -> None:
+        """Evict the least recently used records of a guild until it's within its bound."""
+        while len(messages) > MessageStoreConfig.max_messages_per_guild:
+            _, evicted = messages.popitem(last=False)
+            self.evictions += 1
+            if MessageStoreConfig.spill:
+                self._spilled[evicted.id] = evicted
+
+    def _may_be_stored(self, message_id: int) -> bool:
+        """Return True if the database may hold the message with the given `message_id`."""
+        if not MessageStoreConfig.spill:
+            return False
+        # Rows past their retention are pruned, so there's no point looking for older messages.
+        cutoff = discord.utils.utcnow() - timedelta(seconds=MessageStoreConfig.retention)
+        return discord.utils.snowflake_time(message_id) > cutoff
+
+    def get(self, guild_id: int, message_id: int) -> t.Optional[MessageRecord]:
+        """Return the record of the message with the given `message_id` if it's held in memory."""
+        messages = self._guilds.get(guild_id)
+        record = messages.get(message_id) if messages else None
+        return record or self._spilled.get(message_id) or self._flushing.get(message_id)
+
+    async def fetch(self, guild_id: int, message_id: int) -> t.Optional[MessageRecord]:
+        """Return the record of the message with the given `message_id`, looking in the database if needed."""
+        record = self.get(guild_id, message_id)
+        if record is None and self._may_be_stored(message_id):
+            row = await StoredMessage.get(str(message_id))
+            if row is not None:
+                record = MessageRecord.from_row(row)
+        return record
+
+    async def update(self, guild_id: int, message_id: int, content: str) -> t.Optional[MessageRecord]:
+        """
+        Replace the content of the message with the given `message_id` and return its previous record.
+
+        The message becomes the most recently used one of its guild.
+        """
+        previous = await self.pop(guild_id, message_id)
+        if previous is None:
+            return None
+
+        record = MessageRecord(
+            previous.id,
+            previous.guild_id,
+            previous.channel_id,
+            previous.author_id,
+            previous.author_name,
+            content,
+            previous.attachments,
+            previous.created_at,
+        )
+        messages = self._guilds.setdefault(guild_id, OrderedDict())
+        messages[message_id] = record
+        self._evict(messages)
+
+        return previous
+
+    async def pop(self, guild_id: int, message_id: int) -> t.Optional[MessageRecord]:
+        """Remove the message with the given `message_id` from the store and return its record."""
+        messages = self._guilds.get(guild_id)
+        record = messages.pop(message_id, None) if messages else None
+        if record is None:
+            # A record taken out of a flush in progress has its row deleted once the flush commits.
+            record = self._spilled.pop(message_id, None) or self._flushing.pop(message_id, None)
+
+        if record is None and self._may_be_stored(message_id):
+            row = await StoredMessage.get(str(message_id))
+            if row is not None:
+                record = MessageRecord.from_row(row)
+                await row.delete()
+
+        return record
+
+    def discard(self, guild_id: int, message_ids: t.Iterable[int]) -> None:
+        """Forget the messages with the given IDs, without looking for them in the database."""
+        messages = self._guilds.get(guild_id, {})
+        for message_id in message_ids:
+            messages.pop(message_id, None)
+            self._spilled.pop(message_id, None)
+            self._flushing.pop(message_id, None)
+
+    def remove_guild(self, guild_id: int) -> None:
+        """Forget every message of the guild with the given `guild_id`."""
+        messages = self._guilds.pop(guild_id, None)
+        if messages is not None:
+            log.debug(f"Dropped {len(messages)} stored messages of guild {guild_id}.")
+
+    async def flush(self) -> None:
+        """Write evicted records to the database and prune rows past their retention."""
+        if self._spilled:
+            self._flushing, self._spilled = self._spilled, {}
+            written = list(self._flushing)
+
+            rows = [record.to_row() for record in self._flushing.values()]
+            statement = insert(StoredMessage.__table__).values(rows)
+            # A message which was looked up, edited and evicted again may still have its old row.
+            statement = statement.on_conflict_do_update(
+                index_elements=[StoredMessage.id], set_={"content": statement.excluded.content}
+            )
+            try:
+                await db.status(statement)
+            except Exception:
+                # Keep the records for the next flush, behind anything spilled in the meantime.
+                self._spilled = {**self._flushing, **self._spilled}
+                self._flushing = {}
+                raise
+
+            # Messages deleted or edited while the rows were written were taken out of the flush.
+            gone = [str(message_id) for message_id in written if message_id not in self._flushing]
+            self._flushing = {}
+            if gone:
+                await StoredMessage.delete.where(StoredMessage.id.in_(gone)).gino.status()
+
+            log.trace(f"Spilled {len(written)} messages to the database.")
+
+        if MessageStoreConfig.spill:
+            cutoff = datetime.utcnow() - timedelta(seconds=MessageStoreConfig.retention)
+            await StoredMessage.delete.where(StoredMessage.created_at < cutoff).gino.status()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(MessageStoreConfig.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                log.exception("Failed to write evicted messages to the database.")
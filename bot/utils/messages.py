@@ -1,3 +1,4 @@
+import re
 import typing
 import random
 import logging
@@ -11,6 +12,8 @@ from bot.constants import NEGATIVE_REPLIES
 
 log = logging.getLogger(__name__)
 
+MENTION_RE = re.compile(r"<(@[!&]?|#)(\d+)>")
+
 
 def reaction_check(
     reaction: discord.Reaction,
@@ -58,3 +61,24 @@ async def send_denial(ctx: commands.Context, reason: str) -> discord.Message:
     embed.description = reason
 
     return await ctx.send(embed=embed)
+
+
+def clean_content(guild: typing.Optional[discord.Guild], content: str) -> str:
+    """
+    Return `content` with its mentions resolved like `discord.Message.clean_content` does.
+
+    Unlike that, this works on content from raw events, for which there's no message to clean.
+    """
+    def resolve(match: re.Match) -> str:
+        kind, id_ = match.group(1), int(match.group(2))
+        if kind == "#":
+            channel = guild and guild.get_channel(id_)
+            return f"#{channel.name}" if channel else "#deleted-channel"
+        if kind == "@&":
+            role = guild and guild.get_role(id_)
+            return f"@{role.name}" if role else "@deleted-role"
+        member = guild and guild.get_member(id_)
+        return f"@{member.display_name}" if member else "@deleted-user"
+
+    content = MENTION_RE.sub(resolve, content)
+    return content.replace("@everyone", "@\u200beveryone").replace("@here", "@\u200bhere")
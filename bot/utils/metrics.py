@@ -0,0 +1,203 @@
+"""
+Minimal in-process metrics, rendered in the Prometheus text exposition format.
+
+Metrics are registered on the module level `registry` when they're created. Each one can have
+label names; values are tracked per combination of label values given as keyword arguments.
+"""
+
+import bisect
+import math
+import typing as t
+from collections import defaultdict
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = t.Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: t.Sequence[str], values: t.Sequence[str]) -> str:
+    if not names:
+        return ""
+
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"'
+        for name, value in zip(names, values)
+    )
+    return f"{{{pairs}}}"
+
+
+class Metric:
+    """Base class for metrics, handling registration, labels and rendering of the header."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: t.Sequence[str] = (), *, register: bool = True):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+        if register:
+            registry.register(self)
+
+    def _label_values(self, labels: t.Dict[str, t.Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}.")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> t.Iterator[t.Tuple[str, t.Sequence[str], t.Sequence[str], float]]:
+        """Yield (sample name, label names, label values, value) tuples."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Return the metric in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for name, labelnames, labelvalues, value in self.samples():
+            lines.append(f"{name}{_format_labels(labelnames, labelvalues)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A value which only ever goes up."""
+
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: t.Dict[LabelValues, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increment the counter for the given labels by `amount`."""
+        self._values[self._label_values(labels)] += amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._label_values(labels), 0.0)
+
+    def samples(self) -> t.Iterator[t.Tuple[str, t.Sequence[str], t.Sequence[str], float]]:
+        for labelvalues, value in self._values.items():
+            yield f"{self.name}_total", self.labelnames, labelvalues, value
+
+
+class Gauge(Metric):
+    """
+    A value which can go up and down.
+
+    Instead of being set, a gauge can also be given a function with `set_function`, which is
+    called whenever the gauge is rendered. The function returns either a single value, or a
+    mapping of label value tuples to values.
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: t.Dict[LabelValues, float] = {}
+        self._function: t.Optional[t.Callable[[], t.Union[float, t.Mapping[LabelValues, float]]]] = None
+
+    def set(self, value: float, **labels) -> None:
+        """Set the gauge for the given labels to `value`."""
+        self._values[self._label_values(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        label_values = self._label_values(labels)
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: t.Callable[[], t.Union[float, t.Mapping[LabelValues, float]]]) -> None:
+        """Compute the gauge's value(s) by calling `function` whenever it's rendered."""
+        self._function = function
+
+    def samples(self) -> t.Iterator[t.Tuple[str, t.Sequence[str], t.Sequence[str], float]]:
+        values = self._values
+        if self._function is not None:
+            computed = self._function()
+            values = computed if isinstance(computed, t.Mapping) else {(): computed}
+
+        for labelvalues, value in values.items():
+            yield self.name, self.labelnames, labelvalues, value
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, along with their sum and count."""
+
+    type_name = "histogram"
+
+    def __init__(self, *args, buckets: t.Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: t.Dict[LabelValues, t.List[int]] = {}
+        self._sums: t.Dict[LabelValues, float] = defaultdict(float)
+
+    def observe(self, value: float, **labels) -> None:
+        """Record a single observation of `value` for the given labels."""
+        label_values = self._label_values(labels)
+        counts = self._counts.get(label_values)
+        if counts is None:
+            # One extra bucket for +Inf.
+            counts = self._counts[label_values] = [0] * (len(self.buckets) + 1)
+
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[label_values] += value
+
+    def samples(self) -> t.Iterator[t.Tuple[str, t.Sequence[str], t.Sequence[str], float]]:
+        labelnames = (*self.labelnames, "le")
+
+        for labelvalues, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", labelnames, (*labelvalues, _format_value(bound)), cumulative
+
+            yield f"{self.name}_sum", self.labelnames, labelvalues, self._sums[labelvalues]
+            yield f"{self.name}_count", self.labelnames, labelvalues, cumulative
+
+
+class Registry:
+    """A collection of metrics which can be rendered together."""
+
+    def __init__(self):
+        self._metrics: t.Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"A metric named {metric.name} is already registered.")
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> t.Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Return every registered metric in the Prometheus text format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = Registry()
+
+gateway_events = Counter("fluffington_gateway_events", "Gateway events received, by event type.", ("event",))
+command_invocations = Counter("fluffington_command_invocations", "Commands invoked, by command name.", ("command",))
+command_seconds = Histogram("fluffington_command_seconds", "Wall time of command invocations.", ("command",))
+db_query_seconds = Histogram("fluffington_db_query_seconds", "Time spent executing database queries.", ("method",))
+http_request_seconds = Histogram(
+    "fluffington_http_request_seconds", "Time spent on Discord HTTP API requests, by route.", ("method", "route")
+)
+scheduled_tasks = Gauge("fluffington_scheduled_tasks", "Tasks held by each scheduler.", ("scheduler",))
+loop_lag_seconds = Histogram(
+    "fluffington_loop_lag_seconds",
+    "Delay between when the event loop should have run a sampling task and when it did.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+log_queue_depth = Gauge("fluffington_log_queue_depth", "Mod log embeds waiting to be delivered.")
@@ -0,0 +1,195 @@
+import re
+import typing as t
+
+try:
+    from re import _compiler as sre_compile, _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_compile
+    import sre_constants
+    import sre_parse
+
+# Longest pattern accepted from users.
+MAX_PATTERN_LENGTH = 200
+
+# Escapes such as \x41 which can stand for an uppercase character in an otherwise lowercase pattern.
+_CHARACTER_CODE_ESCAPE = re.compile(r"\\[xu0-9]")
+
+# Characters the character sets of quantifiers are compared on, covering most scripts people type in.
+_PROBE = "".join(map(chr, range(0x3100)))
+
+_SINGLE_CHARACTERS = {sre_constants.LITERAL, sre_constants.NOT_LITERAL, sre_constants.ANY, sre_constants.IN}
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, "POSSESSIVE_REPEAT"):
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+
+
+class UnsafePatternError(ValueError):
+    """Raised when a user supplied pattern is invalid or could take exponential time to match."""
+
+
+def _characters(item: t.Any) -> t.Optional[t.FrozenSet[str]]:
+    """
+    Return the characters of `_PROBE` which the single character `item` matches.
+
+    Return None if `item` isn't a single character, such as `.`, `a` or `[^\\s]`.
+    """
+    if len(item) != 1 or item[0][0] not in _SINGLE_CHARACTERS:
+        return None
+    return frozenset(sre_compile.compile(item).findall(_PROBE))
+
+
+def _contains_branch(subpattern: t.Iterable) -> bool:
+    """Return True if `subpattern` contains an alternation anywhere."""
+    for op, av in subpattern:
+        if op in (sre_constants.BRANCH, sre_constants.GROUPREF_EXISTS):
+            return True
+        if op in _REPEATS and _contains_branch(av[2]):
+            return True
+        if op is sre_constants.SUBPATTERN and _contains_branch(av[-1]):
+            return True
+        if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT) and _contains_branch(av[1]):
+            return True
+        if op is getattr(sre_constants, "ATOMIC_GROUP", None) and _contains_branch(av):
+            return True
+    return False
+
+
+class _RepeatChecker:
+    """
+    Walk a parsed pattern, raising an `UnsafePatternError` for quantifiers which can backtrack catastrophically.
+
+    Refused are quantifiers nested in a way that gives the engine exponentially many ways to split
+    the text, such as `(a+)+` or `(.*a){8}`, variable quantifiers around an alternation, such as
+    `(a|aa)+`, and unbounded quantifiers which could match the same characters as each other,
+    such as `.*a.*b`, as each of them multiplies the work of a failing search by the text's length.
+    """
+
+    def __init__(self) -> None:
+        # The items of every unbounded repeat in the pattern.
+        self.unbounded: t.List[t.Any] = []
+
+    def check_pattern(self, pattern: t.Any) -> None:
+        """Check the whole parsed `pattern`."""
+        self.check(pattern)
+
+        if len(self.unbounded) < 2:
+            return
+
+        characters = [_characters(item) for item in self.unbounded]
+        for i, first in enumerate(characters):
+            for second in characters[i + 1:]:
+                if first is None or second is None or first & second:
+                    raise UnsafePatternError(
+                        "Quantifiers such as `+` and `*` can't repeat characters another one can also match, "
+                        "like in `.*a.*b`."
+                    )
+
+    def check(self, subpattern: t.Iterable, outer_repeat: t.Optional[bool] = None) -> None:
+        """
+        Check `subpattern` and everything in it.
+
+        `outer_repeat` is None outside of any repeat, otherwise whether an enclosing repeat is unbounded.
+        """
+        for op, av in subpattern:
+            if op in _REPEATS and av[1] > 1:
+                min_, max_, item = av
+                unbounded = max_ == sre_constants.MAXREPEAT
+                variable = min_ != max_
+
+                # Any repeat around one which can match a varying number of times gives the engine a
+                # choice to backtrack on, and only a bounded one inside a bounded one keeps that small.
+                if outer_repeat is not None and (unbounded or (variable and outer_repeat)):
+                    raise UnsafePatternError("Nested quantifiers such as `(a+)+` or `(.*a){8}` aren't allowed.")
+                if variable and _contains_branch(item):
+                    raise UnsafePatternError("Quantified alternations such as `(a|aa)+` aren't allowed.")
+
+                if unbounded:
+                    self.unbounded.append(item)
+                self.check(item, bool(outer_repeat) or unbounded)
+            elif op in _REPEATS:
+                self.check(av[2], outer_repeat)
+            elif op is sre_constants.GROUPREF:
+                raise UnsafePatternError("Backreferences aren't allowed.")
+            elif op is sre_constants.SUBPATTERN:
+                self.check(av[-1], outer_repeat)
+            elif op is sre_constants.BRANCH:
+                for branch in av[1]:
+                    self.check(branch, outer_repeat)
+            elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+                self.check(av[1], outer_repeat)
+            elif op is sre_constants.GROUPREF_EXISTS:
+                for branch in av[1:]:
+                    if branch is not None:
+                        self.check(branch, outer_repeat)
+            elif op is getattr(sre_constants, "ATOMIC_GROUP", None):
+                self.check(av, outer_repeat)
+
+
+class CaseInsensitivePattern:
+    """
+    A compiled pattern which matches regardless of case.
+
+    CPython can't scan for the literal prefix of an IGNORECASE pattern, which makes searching
+    several times slower than searching lowercased text with a case-sensitive pattern. That
+    gives the same results whenever the pattern itself can't match uppercase characters, so it's
+    used for patterns without uppercase characters or character code escapes, which covers most
+    patterns people type. Others are compiled with IGNORECASE.
+    """
+
+    __slots__ = ("pattern", "lowercase", "_compiled")
+
+    def __init__(self, pattern: str) -> None:
+        self.pattern = pattern
+        self.lowercase = pattern == pattern.lower() and not _CHARACTER_CODE_ESCAPE.search(pattern)
+        self._compiled = re.compile(pattern) if self.lowercase else re.compile(pattern, re.IGNORECASE)
+
+    def search(self, text: str) -> bool:
+        """Return True if the pattern matches anywhere in `text`."""
+        if self.lowercase:
+            text = text.lower()
+        return self._compiled.search(text) is not None
+
+
+def compile_safe(pattern: str) -> CaseInsensitivePattern:
+    """
+    Compile a user supplied `pattern` to match regardless of case, rejecting patterns which could make matching hang.
+
+    Python's regex engine can't be interrupted, so rather than timing matches out, the syntax is
+    restricted: quantifiers which can backtrack catastrophically (see `_RepeatChecker`) and
+    backreferences are refused along with overly long patterns.
+    """
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        raise UnsafePatternError(f"Patterns can't be longer than {MAX_PATTERN_LENGTH} characters.")
+
+    try:
+        _RepeatChecker().check_pattern(sre_parse.parse(pattern, re.IGNORECASE))
+        return CaseInsensitivePattern(pattern)
+    except re.error as e:
+        raise UnsafePatternError(f"Invalid pattern: {e}.") from e
+
+
+def _embed_texts(message) -> t.Iterator[str]:
+    for embed in message.embeds:
+        yield embed.title
+        yield embed.description
+        yield embed.footer.text
+        yield embed.author.name
+        for field in embed.fields:
+            yield field.name
+            yield field.value
+
+
+def message_matches(pattern: CaseInsensitivePattern, message) -> bool:
+    """
+    Return True if `pattern` matches the content of `message` or the text of any of its embeds.
+
+    The embeds are only looked at if the content doesn't match, and their text is joined so it can
+    be searched at once.
+    """
+    if message.content and pattern.search(message.content):
+        return True
+    if not message.embeds:
+        return False
+
+    return pattern.search("\n".join(text for text in _embed_texts(message) if text))
@@ -1,6 +1,9 @@
 import asyncio
 import contextlib
+import contextvars
+import heapq
 import inspect
+import itertools
 import logging
 import typing as t
 from datetime import datetime
@@ -31,6 +34,10 @@ class Scheduler:
         """Return True if a task with the given `task_id` is currently scheduled."""
         return task_id in self._scheduled_tasks
 
+    def __len__(self) -> int:
+        """Return the number of currently scheduled tasks."""
+        return len(self._scheduled_tasks)
+
     def schedule(self, task_id: t.Hashable, coroutine: t.Coroutine) -> None:
         """
         Schedule the execution of a `coroutine`.
@@ -152,6 +159,179 @@ class Scheduler:
                 self._log.error(f"Error in task #{task_id} {id(done_task)}!", exc_info=exception)
 
 
+class HeapScheduler(Scheduler):
+    """
+    A `Scheduler` which keeps delayed coroutines in a min-heap driven by a single timer.
+
+    `Scheduler` creates a task sleeping in `_await_later` for every delayed coroutine, so every
+    pending item holds a live task until it's due. This backend instead stores pending coroutines
+    in a heap of (due time, sequence, task ID) entries and arms one event loop timer for the
+    earliest entry. A task is only created once an item is due.
+
+    The public API is the same as the one of `Scheduler`; the `in` operator and `len` count both
+    pending and running items.
+
+    Cancelled items are removed from the heap lazily, once they reach its top. The heap is rebuilt
+    when stale entries start outnumbering live ones.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+
+        self._pending: t.Dict[t.Hashable, t.Tuple[float, int, t.Coroutine]] = {}
+        self._heap: t.List[t.Tuple[float, int, t.Hashable]] = []
+        self._sequence = itertools.count()
+
+        self._timer: t.Optional[asyncio.TimerHandle] = None
+        self._timer_due: t.Optional[float] = None
+
+    def __contains__(self, task_id: t.Hashable) -> bool:
+        """Return True if a task with the given `task_id` is currently pending or running."""
+        return task_id in self._pending or task_id in self._scheduled_tasks
+
+    def __len__(self) -> int:
+        """Return the number of pending and running tasks."""
+        return len(self._pending) + len(self._scheduled_tasks)
+
+    def schedule(self, task_id: t.Hashable, coroutine: t.Coroutine) -> None:
+        """
+        Schedule the execution of a `coroutine`.
+        If a task with `task_id` already exists, close `coroutine` instead of scheduling it. This
+        prevents unawaited coroutine warnings. Don't pass a coroutine that'll be re-used elsewhere.
+        """
+        msg = f"Cannot schedule an already started coroutine for #{task_id}"
+        assert inspect.getcoroutinestate(coroutine) == "CORO_CREATED", msg
+
+        if task_id in self:
+            self._log.debug(f"Did not schedule task #{task_id}; task was already scheduled.")
+            coroutine.close()
+            return
+
+        super().schedule(task_id, self._await_now(task_id, coroutine))
+
+    def schedule_at(self, time: datetime, task_id: t.Hashable, coroutine: t.Coroutine) -> None:
+        """
+        Schedule `coroutine` to be executed at the given `time`.
+        If `time` is timezone aware, then use that timezone to calculate now() when subtracting.
+        If `time` is naïve, then use UTC.
+        If `time` is in the past, schedule `coroutine` immediately.
+        If a task with `task_id` already exists, close `coroutine` instead of scheduling it. This
+        prevents unawaited coroutine warnings. Don't pass a coroutine that'll be re-used elsewhere.
+        """
+        now_datetime = datetime.now(time.tzinfo) if time.tzinfo else datetime.utcnow()
+        self.schedule_later((time - now_datetime).total_seconds(), task_id, coroutine)
+
+    def schedule_later(self, delay: t.Union[int, float], task_id: t.Hashable, coroutine: t.Coroutine) -> None:
+        """
+        Schedule `coroutine` to be executed after the given `delay` number of seconds.
+        If a task with `task_id` already exists, close `coroutine` instead of scheduling it. This
+        prevents unawaited coroutine warnings. Don't pass a coroutine that'll be re-used elsewhere.
+        """
+        if delay <= 0:
+            self.schedule(task_id, coroutine)
+            return
+
+        msg = f"Cannot schedule an already started coroutine for #{task_id}"
+        assert inspect.getcoroutinestate(coroutine) == "CORO_CREATED", msg
+
+        if task_id in self:
+            self._log.debug(f"Did not schedule task #{task_id}; task was already scheduled.")
+            coroutine.close()
+            return
+
+        due = asyncio.get_event_loop().time() + delay
+        sequence = next(self._sequence)
+
+        self._pending[task_id] = (due, sequence, coroutine)
+        heapq.heappush(self._heap, (due, sequence, task_id))
+        self._log.debug(f"Queued task #{task_id} to run in {delay} seconds.")
+
+        self._arm_timer()
+
+    def cancel(self, task_id: t.Hashable) -> None:
+        """Unschedule the task identified by `task_id`. Log a warning if the task doesn't exist."""
+        try:
+            _, _, coroutine = self._pending.pop(task_id)
+        except KeyError:
+            super().cancel(task_id)
+        else:
+            coroutine.close()
+            self._log.debug(f"Unscheduled pending task #{task_id}.")
+
+            self._compact()
+            self._arm_timer()
+
+    def cancel_all(self) -> None:
+        """Unschedule all known tasks."""
+        self._log.debug("Unscheduling all tasks")
+
+        for task_id in (*self._pending, *self._scheduled_tasks):
+            self.cancel(task_id)
+
+    def _is_stale(self, entry: t.Tuple[float, int, t.Hashable]) -> bool:
+        """Return True if the heap `entry` no longer belongs to a pending item."""
+        _, sequence, task_id = entry
+        pending = self._pending.get(task_id)
+        return pending is None or pending[1] != sequence
+
+    def _compact(self) -> None:
+        """Rebuild the heap without stale entries once they make up most of it."""
+        if len(self._heap) > 2 * len(self._pending) + 64:
+            self._heap = [entry for entry in self._heap if not self._is_stale(entry)]
+            heapq.heapify(self._heap)
+
+    def _arm_timer(self) -> None:
+        """Make sure the timer fires when the earliest pending item is due."""
+        while self._heap and self._is_stale(self._heap[0]):
+            heapq.heappop(self._heap)
+
+        due = self._heap[0][0] if self._heap else None
+        if due == self._timer_due:
+            return
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        self._timer_due = due
+        if due is not None:
+            self._timer = asyncio.get_event_loop().call_at(due, self._fire)
+
+    def _fire(self) -> None:
+        """Start a task for every pending item which is due and re-arm the timer."""
+        # The loop may run the timer slightly before its due time, within its clock resolution.
+        now = max(asyncio.get_event_loop().time(), self._timer_due)
+        self._timer = None
+        self._timer_due = None
+
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_stale(entry):
+                continue
+
+            task_id = entry[2]
+            _, _, coroutine = self._pending.pop(task_id)
+
+            self._log.trace(f"Task #{task_id} is due; now awaiting the coroutine.")
+            super().schedule(task_id, self._await_now(task_id, coroutine))
+
+        self._arm_timer()
+
+    async def _await_now(self, task_id: t.Hashable, coroutine: t.Coroutine) -> None:
+        """Await `coroutine`, shielding it from the cancellation of its own task."""
+        try:
+            # Use asyncio.shield to prevent the coroutine from cancelling itself.
+            await asyncio.shield(coroutine)
+        finally:
+            # Close it to prevent unawaited coroutine warnings if the task was cancelled before it started.
+            state = inspect.getcoroutinestate(coroutine)
+            if state == "CORO_CREATED":
+                self._log.debug(f"Explicitly closing the coroutine for #{task_id}.")
+                coroutine.close()
+            else:
+                self._log.debug(f"Finally block reached for #{task_id}; {state=}")
+
+
 def create_task(
     coro: t.Awaitable,
     *,
@@ -163,10 +343,12 @@ def create_task(
     Wrapper for creating asyncio `Task`s which logs exceptions raised in the task.
     If the loop kwarg is provided, the task is created from that event loop, otherwise the running loop is used.
     """
+    # Start the task in an empty context, so its work isn't attributed to the command which started it.
+    context = contextvars.Context()
     if event_loop is not None:
-        task = event_loop.create_task(coro, **kwargs)
+        task = context.run(event_loop.create_task, coro, **kwargs)
     else:
-        task = asyncio.create_task(coro, **kwargs)
+        task = context.run(asyncio.create_task, coro, **kwargs)
     task.add_done_callback(partial(_log_task_exception, suppressed_exceptions=suppressed_exceptions))
     return task
 
@@ -1,5 +1,9 @@
 """Library to interact asynchronously with tio.run"""
 
+import asyncio
+import time
+import typing as t
+from collections import OrderedDict
 from functools import partial
 from urllib.request import Request, urlopen
 from gzip import decompress
@@ -24,16 +28,97 @@ def _to_tio_string(couple: tuple) -> bytes:
 
 
 class Tio:
-    """Represents the Tio instance where code is executed"""
+    """
+    Represents the Tio instance where code is executed
+
+    Requests go through `session` when one is given, such as the bot's `http_session`, otherwise
+    through a session with its own pooled connector which is created on first use and closed by
+    `close`. At most `max_concurrency` executions run at once, the results of the last
+    `cache_size` distinct executions are remembered, and the language list is cached for
+    `languages_ttl` seconds.
+    """
 
     def __init__(
         self,
         backend="https://tio.run/cgi-bin/run/api/",
         json="https://tio.run/languages.json",
+        *,
+        session: t.Optional[aiohttp.ClientSession] = None,
+        max_concurrency: int = 4,
+        cache_size: int = 128,
+        languages_ttl: float = 3600,
     ):
         self.backend = backend
         self.json = json
 
+        self.session = session
+        self._owns_session = False
+        self.max_concurrency = max_concurrency
+        self._semaphore: t.Optional[asyncio.Semaphore] = None
+
+        self.cache_size = cache_size
+        self._results: OrderedDict = OrderedDict()
+
+        self.languages_ttl = languages_ttl
+        self._languages: t.Optional[dict] = None
+        self._languages_fetched_at = 0.0
+        self._languages_lock: t.Optional[asyncio.Lock] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the session to send requests through, creating a pooled one if needed."""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self.session = aiohttp.ClientSession(connector=connector)
+            self._owns_session = True
+        return self.session
+
+    async def close(self) -> None:
+        """Close the session, unless it was given to us."""
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+            self._owns_session = False
+
+    async def languages(self) -> dict:
+        """Return the index of languages available on tio, fetching it if the cached copy expired."""
+        # Created lazily so they're bound to the running loop.
+        if self._languages_lock is None:
+            self._languages_lock = asyncio.Lock()
+
+        async with self._languages_lock:
+            if self._languages is None or time.monotonic() - self._languages_fetched_at > self.languages_ttl:
+                async with self._get_session().get(self.json) as res:
+                    self._languages = await res.json(content_type=None)
+                self._languages_fetched_at = time.monotonic()
+
+        return self._languages
+
+    async def execute(
+        self,
+        language: str,
+        code: str,
+        inputs: str = "",
+        cflags: list = [],
+        options: list = [],
+        args: list = [],
+    ) -> str:
+        """Run `code` with the given `language` and return tio output, reusing the result of identical runs"""
+        key = (language, code, inputs, tuple(cflags), tuple(options), tuple(args))
+
+        try:
+            self._results.move_to_end(key)
+            return self._results[key]
+        except KeyError:
+            pass
+
+        output = await self.async_send(self.new_request(language, code, inputs, cflags, options, args))
+
+        self._results[key] = output
+        if len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+
+        return output
+
     @staticmethod
     def new_request(
         language: str,
@@ -63,8 +148,11 @@ class Tio:
     async def async_send(self, request) -> str:
         """Sends given request and returns tio output (async)"""
 
-        async with aiohttp.ClientSession() as client_session:
-            async with client_session.post(self.backend, data=request) as res:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            async with self._get_session().post(self.backend, data=request) as res:
 
                 data = await res.read()
                 data = data.decode("utf-8")
@@ -0,0 +1,91 @@
+import difflib
+import typing as t
+
+# Most changed words of each version of a message which are compared, the rest are cut off.
+MAX_DIFF_WORDS = 500
+
+# Runs of unchanged words longer than this are shortened to their first and last word.
+MAX_UNCHANGED_WORDS = 2
+
+DiffGroup = t.Tuple[str, t.Tuple[str, ...]]
+
+
+def diff_words(before: t.Sequence[str], after: t.Sequence[str]) -> t.List[DiffGroup]:
+    """
+    Return the difference between two lists of words, grouped into runs of removed, added and unchanged words.
+
+    Each group is a tuple of its type, "-", "+" or " " as with `difflib.ndiff`, and its words.
+    Words are mapped to integers before being compared, which makes each comparison a cheap
+    integer comparison, and unlike `ndiff` no similar lines are searched for within replacements.
+    """
+    ids = {}
+    before_ids = [ids.setdefault(word, len(ids)) for word in before]
+    after_ids = [ids.setdefault(word, len(ids)) for word in after]
+
+    groups = []
+    matcher = difflib.SequenceMatcher(None, before_ids, after_ids, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            groups.append((" ", tuple(before[i1:i2])))
+            continue
+        if i1 != i2:
+            groups.append(("-", tuple(before[i1:i2])))
+        if j1 != j2:
+            groups.append(("+", tuple(after[j1:j2])))
+
+    return groups
+
+
+def format_edit(before: str, after: str) -> t.Tuple[str, str]:
+    """
+    Return the two versions of an edited message with changed words highlighted as links.
+
+    Words both versions start or end with are left out of the comparison. Only up to
+    `MAX_DIFF_WORDS` words of each version's changed region are compared, the rest are replaced
+    with a note that further changes aren't shown.
+    """
+    before_words = before.split()
+    after_words = after.split()
+
+    prefix = 0
+    shortest = min(len(before_words), len(after_words))
+    while prefix < shortest and before_words[prefix] == after_words[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < shortest - prefix and before_words[-1 - suffix] == after_words[-1 - suffix]:
+        suffix += 1
+
+    changed_before = before_words[prefix:len(before_words) - suffix]
+    changed_after = after_words[prefix:len(after_words) - suffix]
+    truncated = len(changed_before) > MAX_DIFF_WORDS or len(changed_after) > MAX_DIFF_WORDS
+
+    groups = diff_words(changed_before[:MAX_DIFF_WORDS], changed_after[:MAX_DIFF_WORDS])
+    if prefix:
+        groups.insert(0, (" ", tuple(before_words[:prefix])))
+    if suffix and not truncated:
+        groups.append((" ", tuple(before_words[len(before_words) - suffix:])))
+
+    content_before = []
+    content_after = []
+    for index, (diff_type, words) in enumerate(groups):
+        sub = " ".join(words)
+        if diff_type == "-":
+            content_before.append(f"[{sub}](http://o.hi)")
+        elif diff_type == "+":
+            content_after.append(f"[{sub}](http://o.hi)")
+        else:
+            if len(words) > MAX_UNCHANGED_WORDS:
+                sub = (
+                    f"{words[0] if index > 0 else ''}"
+                    " ... "
+                    f"{words[-1] if index < len(groups) - 1 or truncated else ''}"
+                )
+            content_before.append(sub)
+            content_after.append(sub)
+
+    if truncated:
+        note = f"... (changes past {MAX_DIFF_WORDS} changed words aren't shown)"
+        content_before.append(note)
+        content_after.append(note)
+
+    return " ".join(content_before), " ".join(content_after)
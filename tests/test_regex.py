@@ -0,0 +1,42 @@
+import pytest
+
+from bot.utils.regex import UnsafePatternError, compile_safe
+
+# Each of these takes minutes or longer to fail to match against a few dozen characters.
+CATASTROPHIC_PATTERNS = (
+    r"(a+)+$",
+    r"(a*)*b",
+    r"(a|aa)+$",
+    r"(.*a){8}$",
+    r".*.*.*.*.*.*x",
+    r".*a.*b.*c",
+    r"a+\w+b",
+    r"(\w+\s?)+$",
+    r"(.)\1",
+)
+
+SAFE_PATTERNS = (
+    r"free\s+nitro",
+    r"discord\.gg/\w+",
+    r"https?://\S+",
+    r".*nitro",
+    r"(ab){3}",
+    r"(?:cat|dog)s?",
+)
+
+
+@pytest.mark.parametrize("pattern", CATASTROPHIC_PATTERNS)
+def test_catastrophic_patterns_are_refused(pattern):
+    with pytest.raises(UnsafePatternError):
+        compile_safe(pattern)
+
+
+@pytest.mark.parametrize("pattern", SAFE_PATTERNS)
+def test_safe_patterns_are_accepted(pattern):
+    compiled = compile_safe(pattern)
+    assert not compiled.search("a" * 4000 + "!")
+
+
+def test_matching_ignores_case():
+    assert compile_safe(r"free\s+nitro").search("FREE  Nitro")
+    assert compile_safe(r"\S+NITRO").search("freenitro")
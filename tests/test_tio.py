@@ -0,0 +1,78 @@
+import asyncio
+
+from aiohttp import web
+
+from bot.utils.tio import Tio
+
+LANGUAGES = {"python3": {"name": "Python 3"}}
+
+
+class FakeTio:
+    """A local stand-in for tio.run which counts the requests it answers."""
+
+    def __init__(self) -> None:
+        self.app = web.Application()
+        self.app.router.add_post("/run", self.run)
+        self.app.router.add_get("/languages.json", self.languages)
+        self.runner = web.AppRunner(self.app)
+        self.runs = 0
+        self.language_fetches = 0
+
+    async def start(self) -> str:
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        return f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    async def run(self, request: web.Request) -> web.Response:
+        self.runs += 1
+        await request.read()
+        # Output is prefixed with a 16 character token, which Tio removes.
+        return web.Response(text=f"0123456789abcdefoutput {self.runs}")
+
+    async def languages(self, request: web.Request) -> web.Response:
+        self.language_fetches += 1
+        return web.json_response(LANGUAGES)
+
+
+def run_with_tio(test, **kwargs) -> None:
+    async def main():
+        fake = FakeTio()
+        base = await fake.start()
+        tio = Tio(f"{base}/run", f"{base}/languages.json", **kwargs)
+        try:
+            await test(fake, tio)
+        finally:
+            await tio.close()
+            await fake.runner.cleanup()
+
+    asyncio.run(main())
+
+
+def test_execute_reuses_cached_results():
+    async def test(fake, tio):
+        assert await tio.execute("python3", "print(1)") == "output 1"
+        assert await tio.execute("python3", "print(1)") == "output 1"
+        assert fake.runs == 1
+
+        await tio.execute("python3", "print(2)")
+        await tio.execute("python3", "print(3)")
+        # The cache holds two results, so the least recently used one was evicted.
+        assert await tio.execute("python3", "print(1)") == "output 4"
+        assert fake.runs == 4
+
+    run_with_tio(test, cache_size=2)
+
+
+def test_languages_are_cached_until_they_expire():
+    async def test(fake, tio):
+        assert await tio.languages() == LANGUAGES
+        await tio.languages()
+        assert fake.language_fetches == 1
+
+        tio.languages_ttl = 0
+        await asyncio.sleep(0.01)
+        await tio.languages()
+        assert fake.language_fetches == 2
+
+    run_with_tio(test)